@@ -0,0 +1,757 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# # Benchmark of the DeltaDebugging Algorithm over the tex_test_files
+
+# Runs ddmin_connected() of project.py over every .tex file of a folder and reports per file the number of
+# oracle calls (tests), the pdfLaTeX compiles, the cache hit rate, the parse time and the wall time.
+#
+# Besides a real backend (pdfLaTeX on the host or Docker) the SimulatedBackend can be used. It needs neither
+# TeX nor Docker: a small rule-based stand-in of pdfLaTeX emits the '! ' error which the real run would
+# give for the test files. The simulation is deterministic, so its compile counts can be compared between
+# two versions of project.py to find algorithmic regressions:
+#
+#    python3 benchmark.py --backend simulated --json bench_before.json
+#    python3 benchmark.py --backend simulated --compare bench_before.json
+
+# In[1]:
+
+
+import argparse
+import asyncio
+import json
+import re
+import shutil
+import time
+
+import project
+
+
+# In[2]:
+
+
+# token of the simulation: comment, control sequence, math shift, bracket, newline, parameter, sub- and
+# superscript or a run of other characters
+token_pattern = re.compile(r'%[^\n]*|\\([A-Za-z@]+\*?|.)|\$\$|\$|\{|\}|\n|#\d|[_^]|[^\\%${}\n_^#]+|#', re.S)
+
+known_macros = {'documentclass', 'usepackage', 'begin', 'end', 'newcommand', 'renewcommand', 'newenvironment',
+                'renewenvironment', 'item', 'textbf', 'textit', 'emph', 'section', 'subsection', 'label', 'ref',
+                'par', 'centerline', 'today', 'LaTeX', 'TeX', '\\', ' ', '$', '%', '&', '#', '_', '{', '}', ',',
+                'noindent', 'vspace', 'hspace', 'title', 'author', 'maketitle', 'footnote', 'cite'}
+math_macros = {'hat', 'mathbf', 'frac', 'alpha', 'beta', 'sum', 'int', 'sqrt', 'cdot', 'mathrm', 'left', 'right'}
+package_macros = {'xcolor': {'textcolor', 'color'}, 'graphicx': {'includegraphics'}, 'amsmath': {'text', 'align'}}
+known_classes = {'article', 'report', 'book'}
+known_environments = {'document', 'itemize', 'enumerate', 'quote', 'center', 'equation', 'figure', 'tabular', 'description'}
+list_environments = {'itemize', 'enumerate', 'description'}
+
+
+class SimulatedError(Exception):
+    '''
+    the first error of a simulated run, its text is the error block of the log
+    '''
+
+    pass
+
+
+class SimulatedTeX:
+    '''
+    rule-based stand-in of pdfLaTeX. It reads the tokens of a document in order and stops at the first
+    violated rule, e. g. an undefined control sequence, a missing \\begin{document}, an environment ended
+    by the wrong \\end, math commands outside of math mode or a command which is defined twice. The error
+    block looks like the one of pdfLaTeX: '! <message>' followed by the 'l.<line> <source line>' context.
+
+    params text -> the LaTeX string to run
+    '''
+
+    def __init__(self, text):
+
+        self.text = text
+        self.lines = text.split('\n')
+        self.tokens = [(match.group(0), match.start()) for match in token_pattern.finditer(text)]
+        self.index = 0
+        self.document_class = False
+        self.preamble = True
+        self.macros = set(known_macros)
+        self.user_macros = {} # name -> body of \newcommand, '@env@' + name -> (begin, end) of \newenvironment
+        self.environments = set(known_environments)
+        self.stack = [] # open environments with the line of their \begin
+        self.math = None # token which opened the math mode, None outside of math mode
+        self.depth = 0 # depth of the expansion of user macros
+        self.done = False
+
+    def line(self, pos):
+
+        return self.text.count('\n', 0, pos) + 1
+
+    def error(self, message, pos):
+
+        line = self.line(pos)
+        source_line = self.lines[line - 1] if line - 1 < len(self.lines) else ''
+
+        raise SimulatedError(f'! {message}\nl.{line} {source_line}\n')
+
+    def next_token(self):
+
+        while self.index < len(self.tokens):
+
+            token = self.tokens[self.index]
+            self.index += 1
+
+            if not token[0].startswith('%'):
+
+                return token
+
+        return None
+
+    def peek_nonspace(self):
+
+        index = self.index
+
+        while index < len(self.tokens):
+
+            token = self.tokens[index][0]
+
+            if not token.startswith('%') and token.strip() != '':
+
+                return token, index
+
+            index += 1
+
+        return None, index
+
+    def argument(self, opener='{'):
+        '''
+        reads the next argument in curly brackets or, with opener '[', the next optional argument.
+
+        returns the content of the argument, None when there is none
+        '''
+
+        token, index = self.peek_nonspace()
+
+        if opener == '[':
+
+            if token is None or not token.startswith('['):
+
+                return None
+
+            # the optional argument is part of a run of characters, the rest of the run stays a token:
+            self.index = index + 1
+            match = re.match(r'\[([^\]]*)\]', token)
+
+            if match and len(match.group(0)) < len(token):
+
+                self.tokens.insert(self.index, (token[len(match.group(0)):], self.tokens[index][1] + len(match.group(0))))
+
+            return match.group(1) if match else ''
+
+        if token != '{':
+
+            return None
+
+        self.index = index + 1
+        level = 1
+        start = self.tokens[index][1] + 1
+
+        while self.index < len(self.tokens):
+
+            token, pos = self.tokens[self.index]
+            self.index += 1
+
+            if token == '{':
+
+                level += 1
+
+            elif token == '}':
+
+                level -= 1
+
+                if level == 0:
+
+                    return self.text[start:pos]
+
+        self.error('File ended while scanning use of \\@argdef.', len(self.text))
+
+    def run(self):
+        '''
+        returns the error block of the first error, '' when there is none
+        '''
+
+        try:
+
+            while not self.done:
+
+                token = self.next_token()
+
+                if token is None:
+
+                    break
+
+                self.token(*token)
+
+            if not self.done:
+
+                if not self.document_class:
+
+                    self.error('LaTeX Error: Missing \\begin{document}.', len(self.text))
+
+                self.error('Emergency stop.', len(self.text))
+
+        except SimulatedError as error:
+
+            return str(error)
+
+        except RecursionError:
+
+            return '! TeX capacity exceeded, sorry [input stack size=10000].\n'
+
+        return ''
+
+    def need_body(self, pos):
+
+        if not self.document_class or self.preamble:
+
+            self.error('LaTeX Error: Missing \\begin{document}.', pos)
+
+    def token(self, token, pos):
+
+        if token in ('\n', '{', '}'):
+
+            return
+
+        if token.startswith('\\'):
+
+            return self.macro(token[1:], pos)
+
+        if token in ('$', '$$'):
+
+            self.need_body(pos)
+
+            if self.math is None:
+
+                self.math = token
+
+            elif self.math == token:
+
+                self.math = None
+
+            else:
+
+                self.error('Display math should end with $$.', pos)
+
+            return
+
+        if token in ('_', '^'):
+
+            self.need_body(pos)
+
+            if self.math is None:
+
+                self.error('Missing $ inserted.', pos)
+
+            next_token, index = self.peek_nonspace()
+
+            if index + 1 < len(self.tokens) and self.tokens[index + 1][0] == token:
+
+                self.error('Double subscript.' if token == '_' else 'Double superscript.', pos)
+
+            return
+
+        if token.startswith('#'):
+
+            self.error('You can\'t use `macro parameter character #\' in horizontal mode.', pos)
+
+        if token.strip() != '':
+            # text
+
+            self.need_body(pos)
+
+    def macro(self, name, pos):
+
+        if name in ('(', '['):
+
+            self.need_body(pos)
+
+            if self.math is not None:
+
+                self.error('Bad math environment delimiter.', pos)
+
+            self.math = name
+
+            return
+
+        if name in (')', ']'):
+
+            if self.math != {')': '(', ']': '['}[name]:
+
+                self.error('Bad math environment delimiter.', pos)
+
+            self.math = None
+
+            return
+
+        if name == 'documentclass':
+
+            if self.document_class:
+
+                self.error('LaTeX Error: Two \\documentclass or \\documentstyle commands.', pos)
+
+            self.argument('[')
+            document_class = self.argument()
+
+            if document_class not in known_classes:
+
+                self.error(f'LaTeX Error: File `{document_class}.cls\' not found.', pos)
+
+            self.document_class = True
+
+            return
+
+        if not self.document_class:
+
+            if name in self.macros or name in self.user_macros:
+
+                self.error('LaTeX Error: Missing \\begin{document}.', pos)
+
+            self.error('Undefined control sequence.', pos)
+
+        if name == 'usepackage':
+
+            if not self.preamble:
+
+                self.error('LaTeX Error: Can be used only in preamble.', pos)
+
+            self.argument('[')
+
+            for package in (self.argument() or '').split(','):
+
+                package = package.strip()
+
+                if package not in package_macros and package != 'amssymb':
+
+                    self.error(f'LaTeX Error: File `{package}.sty\' not found.', pos)
+
+                self.macros |= package_macros.get(package, set())
+
+            return
+
+        if name in ('newcommand', 'renewcommand'):
+
+            command_name = self.argument()
+
+            if command_name is None:
+
+                token = self.next_token()
+                command_name = token[0] if token else ''
+
+            command_name = command_name.strip().lstrip('\\')
+            exists = command_name in self.macros or command_name in self.user_macros or command_name in math_macros
+
+            if name == 'newcommand' and exists:
+
+                self.error(f'LaTeX Error: Command \\{command_name} already defined.', pos)
+
+            if name == 'renewcommand' and not exists:
+
+                self.error(f'LaTeX Error: \\{command_name} undefined.', pos)
+
+            self.argument('[')
+            self.user_macros[command_name] = self.argument() or ''
+            self.macros.discard(command_name)
+
+            return
+
+        if name in ('newenvironment', 'renewenvironment'):
+
+            environment = self.argument() or ''
+
+            if name == 'newenvironment' and environment in self.environments:
+
+                self.error(f'LaTeX Error: Environment {environment} already defined.', pos)
+
+            self.argument('[')
+            begin_code = self.argument() or ''
+            end_code = self.argument() or ''
+            self.environments.add(environment)
+            self.user_macros['@env@' + environment] = (begin_code, end_code)
+
+            return
+
+        if name == 'begin':
+
+            environment = self.argument()
+
+            if environment is None:
+
+                self.error('Missing \\begin{document}.', pos)
+
+            if environment == 'document':
+
+                if not self.preamble:
+
+                    self.error('LaTeX Error: Can be used only in preamble.', pos)
+
+                self.preamble = False
+                self.stack.append((environment, self.line(pos)))
+
+                return
+
+            self.need_body(pos)
+
+            if self.math is not None and environment != 'array':
+
+                self.error('Missing $ inserted.', pos)
+
+            if environment not in self.environments:
+
+                self.error(f'LaTeX Error: Environment {environment} undefined.', pos)
+
+            self.stack.append((environment, self.line(pos)))
+
+            if '@env@' + environment in self.user_macros:
+
+                self.expand(self.user_macros['@env@' + environment][0], pos)
+
+            return
+
+        if name == 'end':
+
+            environment = self.argument()
+            self.need_body(pos)
+
+            if self.math is not None:
+
+                self.error('Missing $ inserted.', pos)
+
+            if not self.stack:
+
+                self.error(f'LaTeX Error: \\begin{{document}} ended by \\end{{{environment}}}.', pos)
+
+            top, line = self.stack[-1]
+
+            if top != environment:
+
+                self.error(f'LaTeX Error: \\begin{{{top}}} on input line {line} ended by \\end{{{environment}}}.', pos)
+
+            self.stack.pop()
+
+            if '@env@' + environment in self.user_macros:
+
+                self.expand(self.user_macros['@env@' + environment][1], pos)
+
+            if environment == 'document':
+
+                self.done = True
+
+            return
+
+        if name in self.user_macros:
+
+            self.need_body(pos)
+            self.expand(self.user_macros[name], pos)
+
+            return
+
+        if name in math_macros:
+
+            self.need_body(pos)
+
+            if self.math is None:
+
+                self.error('Missing $ inserted.', pos)
+
+            return
+
+        if name == 'item':
+
+            self.need_body(pos)
+
+            if not any(environment in list_environments for environment, line in self.stack):
+
+                self.error('LaTeX Error: Lonely \\item--perhaps a missing list environment.', pos)
+
+            if self.math is not None:
+
+                self.error('Missing $ inserted.', pos)
+
+            return
+
+        if name in self.macros:
+
+            if self.preamble and name not in ('par', 'title', 'author'):
+
+                self.error('LaTeX Error: Missing \\begin{document}.', pos)
+
+            return
+
+        self.error('Undefined control sequence.', pos)
+
+    def expand(self, body, pos):
+        '''
+        runs the body of a user macro or environment, its errors are reported at the line of the usage
+        '''
+
+        self.depth += 1
+
+        if self.depth > 50:
+
+            raise RecursionError
+
+        expansion = SimulatedTeX(body)
+        expansion.document_class, expansion.preamble = self.document_class, self.preamble
+        expansion.macros, expansion.user_macros, expansion.environments = self.macros, self.user_macros, self.environments
+        expansion.math, expansion.depth = self.math, self.depth
+
+        try:
+
+            while True:
+
+                token = expansion.next_token()
+
+                if token is None:
+
+                    break
+
+                expansion.token(token[0], pos)
+
+        except SimulatedError as error:
+
+            message = str(error).split('\n')[0]
+            line = self.line(pos)
+
+            raise SimulatedError(f'{message}\nl.{line} {self.lines[line - 1]}\n')
+
+        self.math = expansion.math
+        self.depth -= 1
+
+
+def simulated_log(latex_string):
+    '''
+    returns the output which pdfLaTeX would print for the LaTeX string according to SimulatedTeX
+    '''
+
+    return 'This is SimulatedTeX\n' + SimulatedTeX(latex_string).run() + '\nend of log\n'
+
+
+# In[3]:
+
+
+class SimulatedBackend(project.CompilerBackend):
+    '''
+    compiler backend which runs SimulatedTeX within the process instead of pdfLaTeX. The output is read
+    by the LogParser like the one of a real run. The optional delay is added to every compile to imitate
+    the duration of pdfLaTeX, e. g. for the parallel mode.
+
+    params delay -> seconds which every compile takes
+    '''
+
+    name = 'simulated'
+
+    def __init__(self, delay=0.0):
+
+        super().__init__()
+        self.delay = delay
+
+    def version(self):
+
+        return self.name + ':1' + self.mode()
+
+    def run(self, latex_string):
+
+        start_time = time.time()
+        parser = project.LogParser()
+
+        for line in simulated_log(latex_string).splitlines(keepends=True):
+
+            if parser.feed(line):
+
+                break
+
+        return project.CompileResult(parser.error_message, 0, time.time() - start_time, self.name)
+
+    def compile(self, latex_string, job_name='candidate', timeout=None, on_start=None):
+
+        if self.delay:
+
+            time.sleep(self.delay)
+
+        return self.run(latex_string)
+
+    async def compile_async(self, latex_string, job_name='candidate', timeout=None):
+
+        if self.delay:
+
+            await asyncio.sleep(self.delay)
+
+        return self.run(latex_string)
+
+
+def real_backend():
+    '''
+    returns the default_backend() of project.py when pdfLaTeX or Docker is installed, else None
+    '''
+
+    if shutil.which('pdflatex') is None and shutil.which('docker') is None:
+
+        return None
+
+    return project.default_backend()
+
+
+# In[4]:
+
+
+def benchmark_file(file_name, backend, **options):
+    '''
+    reduces one .tex file within its own ReductionSession and an oracle_cache in memory only, such that
+    earlier runs do not change the counts.
+
+    params:
+    file_name -> the path including the .tex file to process
+    backend -> CompilerBackend of the session
+    options -> further parameters of the ReductionSession, e. g. workers or strategy
+
+    returns dictionary with the counts and times of the reduction
+    '''
+
+    session = project.ReductionSession(backend=backend, cache_path=None, **options)
+    start_time = time.perf_counter()
+
+    final_latex = session.reduce_file(file_name)
+
+    wall_time = time.perf_counter() - start_time
+    stats = session.stats
+
+    return {'file': file_name,
+            'tests': stats.tests,
+            'compiles': stats.compiles,
+            'cache_hits': stats.cache_hits,
+            'cache_hit_rate': stats.cache_hits / stats.tests if stats.tests else 0.0,
+            'parse_time': stats.parse_time,
+            'wall_time': wall_time,
+            'final_length': len(final_latex or ''),
+            'phases': stats.report()['phases']}
+
+
+def benchmark(pattern, backend, **options):
+    '''
+    runs benchmark_file() for every .tex file of a directory or glob pattern.
+
+    returns:
+    results -> list of the dictionaries of benchmark_file()
+    summary -> dictionary with the totals over all files
+    '''
+
+    results = [benchmark_file(file_name, backend, **options) for file_name in project.batch_files(pattern)]
+    tests = sum(result['tests'] for result in results)
+    cache_hits = sum(result['cache_hits'] for result in results)
+
+    summary = {'backend': backend.version(),
+               'files': len(results),
+               'tests': tests,
+               'compiles': sum(result['compiles'] for result in results),
+               'cache_hit_rate': cache_hits / tests if tests else 0.0,
+               'parse_time': sum(result['parse_time'] for result in results),
+               'wall_time': sum(result['wall_time'] for result in results)}
+
+    return results, summary
+
+
+def print_report(results, summary):
+
+    print(f'{"file":40} {"tests":>6} {"compiles":>8} {"hit rate":>8} {"parse s":>8} {"wall s":>8}')
+
+    for result in results:
+
+        print(f'{result["file"]:40} {result["tests"]:6} {result["compiles"]:8} {result["cache_hit_rate"]:8.2f} '
+              f'{result["parse_time"]:8.3f} {result["wall_time"]:8.3f}')
+
+    print(f'{"total (" + summary["backend"] + ")":40} {summary["tests"]:6} {summary["compiles"]:8} '
+          f'{summary["cache_hit_rate"]:8.2f} {summary["parse_time"]:8.3f} {summary["wall_time"]:8.3f}')
+
+
+def regressions(run, baseline_path):
+    '''
+    compares the compile counts of a run with the ones of the same backend in an earlier JSON output.
+
+    returns list of tuples (file, compiles before, compiles now) of the files which need more compiles
+    '''
+
+    with open(baseline_path) as f:
+
+        baseline_runs = [baseline_run for baseline_run in json.load(f)['runs'] 
+                         if baseline_run['summary']['backend'] == run['summary']['backend']]
+
+    if not baseline_runs:
+
+        return []
+
+    baseline = {result['file']: result['compiles'] for result in baseline_runs[0]['results']}
+    results = run['results']
+
+    return [(result['file'], baseline[result['file']], result['compiles']) for result in results
+            if result['file'] in baseline and result['compiles'] > baseline[result['file']]]
+
+
+# In[5]:
+
+
+def main():
+
+    parser = argparse.ArgumentParser(description='Benchmark of ddmin_connected() over a folder of .tex files')
+    parser.add_argument('pattern', nargs='?', default='tex_test_files', help='directory or glob pattern of the .tex files')
+    parser.add_argument('--backend', choices=['simulated', 'real', 'both'], default='simulated')
+    parser.add_argument('--workers', type=int, default=1, help='pdfLaTeX runs at the same time')
+    parser.add_argument('--strategy', default='subset', choices=sorted(project.ddmin_strategies) + ['hdd'], 
+                        help='one of the ddmin_strategies or hdd')
+    parser.add_argument('--delay', type=float, default=0.0, help='seconds of every simulated compile')
+    parser.add_argument('--json', help='path of the JSON output')
+    parser.add_argument('--compare', help='JSON output of an earlier run, more compiles count as regression')
+    arguments = parser.parse_args()
+
+    backends = []
+
+    if arguments.backend in ('simulated', 'both'):
+
+        backends.append(SimulatedBackend(delay=arguments.delay))
+
+    if arguments.backend in ('real', 'both'):
+
+        backend = real_backend()
+
+        if backend is None:
+
+            print('Neither pdflatex nor docker is installed, the real backend is skipped.')
+
+        else:
+
+            backends.append(backend)
+
+    runs = []
+
+    for backend in backends:
+
+        results, summary = benchmark(arguments.pattern, backend, workers=arguments.workers, strategy=arguments.strategy)
+        print_report(results, summary)
+        runs.append({'summary': summary, 'results': results})
+
+    if arguments.json is not None:
+
+        with open(arguments.json, 'w') as g:
+            json.dump({'runs': runs}, g, indent=2)
+
+    if arguments.compare is not None:
+
+        found = [regression for run in runs for regression in regressions(run, arguments.compare)]
+
+        for file_name, compiles_before, compiles_now in found:
+
+            print(f'Regression: {file_name} needs {compiles_now} instead of {compiles_before} compiles')
+
+        if found:
+
+            raise SystemExit(1)
+
+
+if __name__ == '__main__':
+
+    main()
@@ -20,9 +20,22 @@ import re
 
 import subprocess
 from subprocess import PIPE
-import os, shutil
+import os, shutil, sys, signal
+import tempfile
+import uuid
+import io
+import hashlib
+import sqlite3
+from collections import OrderedDict
+import threading
+import itertools
+import asyncio
 
 import time
+import contextlib
+import json
+import glob
+from concurrent.futures import ThreadPoolExecutor
 
 from pylatexenc.latexwalker import LatexWalker, LatexMacroNode, LatexCharsNode, LatexCommentNode, LatexSpecialsNode, LatexEnvironmentNode, LatexGroupNode, LatexMathNode 
 
@@ -224,8 +237,15 @@ def commandlist_finder(raw_string, start_content_comment='document', normal_oute
 
     back_string = raw_string[body_end_index:]
 
-    w_center = LatexWalker(center_string)
-    (nodelist_center, pos, len_) = w_center.get_latex_nodes(pos=0)
+    # the node lists of the .tex file are already parsed by the document_tree, other strings are parsed here:
+    document_tree = getattr(reduction_state, 'document_tree', None)
+    parsed_center = document_tree.lookup(center_string) if document_tree is not None else None
+    
+    if parsed_center is None:
+        
+        parsed_center = parse_nodelist(center_string)
+        
+    center_commands, center_nested = parsed_center
 
     if len(front_string)>0:
         
@@ -236,10 +256,62 @@ def commandlist_finder(raw_string, start_content_comment='document', normal_oute
         
         command_list = []
         nested_commands = []  
+        
+    command_list.extend(center_commands)
+    nested_commands.extend(center_nested)
+            
+    if len(back_string) > 0:        
+        
+        command_list.append(back_string)
+        nested_commands.append(False)  
+        
+    return command_list, start_content_ind, end_content_ind, nested_commands  
+
+
+def nodelist_counter(node):
+    '''
+    counts the node lists within a node and its arguments, e. g. 1 for \\hat{x} and 2 for \\frac{a}{b}
+    or \\textbf{\\emph{x}}.
+    
+    params node -> node of LatexWalker
+    
+    returns counter -> integer
+    '''
+    
+    counter = 0
+    children = []
+    
+    if node.isNodeType(LatexGroupNode) or node.isNodeType(LatexEnvironmentNode) or node.isNodeType(LatexMathNode):
+        
+        counter += 1
+        children.extend(node.nodelist)
+        
+    if getattr(node, 'nodeargd', None) is not None and node.nodeargd.argnlist is not None:
+        
+        children.extend(node.nodeargd.argnlist)
+        
+    for child in children:
+        
+        if child is not None:
             
+            counter += nodelist_counter(child)
+            
+    return counter
+
+
+def nested_finder(nodelist):
+    '''
+    decides for every node of a node list whether it is a nested command which can be split further.
+    
+    params nodelist -> list of nodes of LatexWalker
+    
+    returns nested_commands -> boolean list, True for a nested node
+    '''
+    
+    nested_commands = []
     command_marker = False
 
-    for node in nodelist_center:
+    for node in nodelist:
         # check for nested structure:
         # overview node types in LatexWalker: https://pylatexenc.readthedocs.io/en/latest/latexnodes.nodes/
 
@@ -265,10 +337,8 @@ def commandlist_finder(raw_string, start_content_comment='document', normal_oute
             else: 
                 
                 command_marker = False            
-
-            list_nodelists = re.findall('nodelist',str(node))
             
-            if len(list_nodelists) > 1: # already a simple command contains a nodelist, eg \\hat{} --> [] .
+            if nodelist_counter(node) > 1: # already a simple command contains a nodelist, eg \\hat{} --> [] .
                 
                 nested_commands.append(True)
             
@@ -311,15 +381,277 @@ def commandlist_finder(raw_string, start_content_comment='document', normal_oute
             nested_commands.append(False)
             command_marker = False
             
-        # store string format:
-        command_list.append(node.latex_verbatim())
+    return nested_commands
+
+
+def parse_nodelist(string):
+    '''
+    parses a string which is no node list of the document_tree with LatexWalker.
+    
+    params string -> string to split into deltas/commands
+    
+    returns:
+    commands -> list of the string parts of the nodes
+    nested_commands -> boolean list which states whether the commands are nested (True) or not (False)
+    '''
+    
+    with timed('parse'):
+        
+        (nodelist, pos, len_) = LatexWalker(string).get_latex_nodes(pos=0)
+    
+    return [node.latex_verbatim() for node in nodelist], nested_finder(nodelist)
+
+
+class DocumentTree:
+    '''
+    the .tex file parsed once by LatexWalker. Every node list of the tree, i. e. the whole file and the 
+    content of every group, environment and math environment, is stored with the absolute start and end 
+    offsets of its nodes and their nested flags. When commandlist_finder() gets the content of such a node,
+    e. g. the body of the document or of a nest entered by delta_splitter(), it takes the nodes from here 
+    instead of parsing the string again.
+    
+    params source -> content of the .tex file as string
+    '''
+    
+    def __init__(self, source):
+        
+        self.source = source
+        self.nodelists = {} # string of a node list -> (list of (start, end) offsets, nested flags)
+        self.children = {} # (start, end) of a node -> list of (start, end) of its child nodes
+        self.hits = 0
+        self.misses = 0
+        
+        (nodelist, pos, len_) = LatexWalker(source).get_latex_nodes(pos=0)
+        self.roots = [(node.pos, node.pos + node.len) for node in nodelist]
+        self.add(nodelist)
+        
+    def add(self, nodelist):
+        
+        for node in nodelist:
+            # the children of a node are its arguments and its content, ordered by their position
+            
+            children = []
             
-    if len(back_string) > 0:        
+            if getattr(node, 'nodeargd', None) is not None and node.nodeargd.argnlist is not None:
+                
+                children.extend(argument for argument in node.nodeargd.argnlist if argument is not None)
+                
+            if node.isNodeType(LatexGroupNode) or node.isNodeType(LatexEnvironmentNode) or node.isNodeType(LatexMathNode):
+                
+                children.extend(node.nodelist)
+                
+            if len(children) > 0:
+                
+                self.children[(node.pos, node.pos + node.len)] = sorted((child.pos, child.pos + child.len) for child in children)
         
-        command_list.append(back_string)
-        nested_commands.append(False)  
+        if len(nodelist) > 0:
+            
+            start = nodelist[0].pos
+            end = nodelist[-1].pos + nodelist[-1].len
+            spans = [(node.pos, node.pos + node.len) for node in nodelist]
+            
+            # only node lists without gaps can be looked up by their string, the first one of equal strings
+            # is kept:
+            if sum(node.len for node in nodelist) == end - start and self.source[start:end] not in self.nodelists:
+                
+                self.nodelists[self.source[start:end]] = (spans, nested_finder(nodelist))
+                
+        for node in nodelist:
+            
+            if node.isNodeType(LatexGroupNode) or node.isNodeType(LatexEnvironmentNode) or node.isNodeType(LatexMathNode):
+                
+                self.add(node.nodelist)
+                
+            if getattr(node, 'nodeargd', None) is not None and node.nodeargd.argnlist is not None:
+                
+                for argument in node.nodeargd.argnlist:
+                    
+                    if argument is not None and argument.isNodeType(LatexGroupNode):
+                        
+                        self.add(argument.nodelist)
+                
+    def lookup(self, string):
+        '''
+        returns the commands and their nested flags of string like parse_nodelist(), None when string is no 
+        node list of the tree
+        '''
         
-    return command_list, start_content_ind, end_content_ind, nested_commands  
+        if string not in self.nodelists:
+            
+            self.misses += 1
+            
+            return None
+        
+        self.hits += 1
+        spans, nested_commands = self.nodelists[string]
+        
+        return [self.source[start:end] for start, end in spans], list(nested_commands)
+    
+    def document_without(self, removed):
+        '''
+        returns the source without the removed nodes
+        
+        params removed -> list of (start, end) of nodes, they may lie within each other
+        '''
+        
+        document = io.StringIO()
+        pos = 0
+        
+        for start, end in sorted(removed):
+            
+            if start >= pos:
+                
+                document.write(self.source[pos:start])
+                
+            pos = max(pos, end)
+            
+        document.write(self.source[pos:])
+        
+        return document.getvalue()
+    
+    
+reduction_state = threading.local() # ReductionSession, DocumentTree, ReductionStats and phase of the .tex file reduced by the current thread
+
+
+def current_session():
+    '''
+    returns the ReductionSession which reduces within the current thread
+    '''
+    
+    session = getattr(reduction_state, 'session', None)
+    
+    if session is None:
+        
+        raise RuntimeError('No ReductionSession is active in this thread, use ReductionSession.reduce_file() or ddmin_connected()')
+    
+    return session
+
+
+class ReductionStats:
+    '''
+    structured report of the reduction of one .tex file or of a whole session: counts the tests, the 
+    compiles and the cache hits, also per phase, and sums the seconds of the measured steps. In the 
+    parallel mode the counts are also raised from the thread of the compile_pool.
+    
+    phases -> e. g. 'original' for the test of the inputted file, 'ddmin level 2' for the second round
+              of ddmin(), 'ddmin granularity 4' for the parts of ddmin_minimal(), 'empty shell', 
+              'nest content', 'nest content in shell' and 'nest content cumulative' of ddmin_loop()
+    times -> 'parse' for LatexWalker, 'backend start' e. g. for the Docker image build and run, 
+             'compile' for the pdfLaTeX runs, 'log retrieval' for the reading of the .log files after the 
+             runs, e. g. from the mount of the Docker container, and 'reduction' for the whole reduction
+    '''
+    
+    def __init__(self):
+        
+        self.lock = threading.Lock()
+        self.tests = 0
+        self.compiles = 0
+        self.cache_hits = 0
+        self.phases = {} # phase -> [tests, compiles]
+        self.times = {} # measured step -> seconds
+        
+    def count(self, compiled, phase=None):
+        
+        with self.lock:
+            
+            counts = self.phases.setdefault(phase or 'other', [0, 0])
+            counts[0] += 1
+            self.tests += 1
+            
+            if compiled:
+                
+                counts[1] += 1
+                self.compiles += 1
+                
+            else:
+                
+                self.cache_hits += 1
+                
+    def add_time(self, name, seconds):
+        
+        with self.lock:
+            
+            self.times[name] = self.times.get(name, 0.0) + seconds
+            
+    @property
+    def parse_time(self):
+        
+        return self.times.get('parse', 0.0)
+                
+    def add(self, other):
+        
+        with self.lock:
+            
+            self.tests += other.tests
+            self.compiles += other.compiles
+            self.cache_hits += other.cache_hits
+            
+            for phase, (tests, compiles) in other.phases.items():
+                
+                counts = self.phases.setdefault(phase, [0, 0])
+                counts[0] += tests
+                counts[1] += compiles
+                
+            for name, seconds in other.times.items():
+                
+                self.times[name] = self.times.get(name, 0.0) + seconds
+                
+    def report(self):
+        '''
+        returns the counts and times as dictionary, e. g. for json.dump()
+        '''
+        
+        with self.lock:
+            
+            return {'tests': self.tests, 
+                    'compiles': self.compiles, 
+                    'cache_hits': self.cache_hits, 
+                    'phases': {phase: {'tests': tests, 'compiles': compiles} for phase, (tests, compiles) in self.phases.items()}, 
+                    'times': dict(self.times)}
+        
+    def write_json(self, path):
+        
+        with open(path, 'w') as g:
+            json.dump(self.report(), g, indent=2)
+            
+    def summary(self):
+        '''
+        returns the report as few lines of text
+        '''
+        
+        report = self.report()
+        lines = [f'{report["tests"]} tests, {report["compiles"]} compiles, {report["cache_hits"]} cache hits']
+        
+        for phase, counts in report['phases'].items():
+            
+            lines.append(f'  {phase}: {counts["tests"]} tests, {counts["compiles"]} compiles')
+            
+        for name, seconds in report['times'].items():
+            
+            lines.append(f'  {name}: {seconds:.3f} s')
+            
+        return '\n'.join(lines)
+            
+            
+@contextlib.contextmanager
+def timed(name):
+    '''
+    adds the seconds of the enclosed block to the ReductionStats of the current thread
+    '''
+    
+    start_time = time.perf_counter()
+    
+    try:
+        
+        yield
+        
+    finally:
+        
+        stats = getattr(reduction_state, 'stats', None)
+        
+        if stats is not None:
+            
+            stats.add_time(name, time.perf_counter() - start_time)
 
 
 # In[24]:
@@ -351,49 +683,194 @@ def content_creator(command_list, first_begin_ind, last_end_ind):
 # In[25]:
 
 
-def latex_failure_check(log_file_image_path, container_name, project_folder): 
+class LogParser:
     '''
-    reads the .log file created by pdfLaTeX to get the error message.
+    reads the output of pdfLaTeX line by line while it is produced and keeps only the first error block: 
+    the line starting with '! ', the context lines and the line number where TeX stopped, e. g.
     
-    params:
-    log_file_image_path -> path within the Docker image where the .log file is stored
-    container_name -> container name which is the instance of the Docker image
-    project_folder -> the outer folder name where to store the .log file 
+        ! Undefined control sequence.
+        l.5 \foo
+                 bar
     
-    returns error_message -> found error message as string
+    As soon as the block is complete the rest of the output is not needed anymore.
     
+    attributes:
+    error_message -> found error block as string, '' when there is none, None when nothing was read
     '''
     
-    # One specific file can be copied FROM the container like:
-    dest_folder = project_folder + '/logs_from_container' + '/' + log_file_image_path.split('/')[-2]
-    os.makedirs(dest_folder, exist_ok=True)
-    dest = dest_folder + '/' + log_file_image_path.split('/')[-1]
-
-    # copy the .log file from Docker image to host:
-    subprocess.run(['docker', 'cp', '' + container_name + ':' +  log_file_image_path , dest])
-    # container_name:path_image, path_host
-    
     # find out specific error message such that we can distinguish between failing ('x') and 
     # unspecified ('?') test:
-    with open(dest, 'r') as f: 
-
-        content = f.read()
-        error_string = '! ' 
+    error_string = '! '
+    
+    # the context line of the input file, e. g. 'l.5 \foo', or of the terminal, '<*> ...':
+    base_context = re.compile(r'l\.\d+ |<\*> ')
+    
+    max_block_lines = 32 # an error block without any line number ends here
+    
+    def __init__(self):
+        
+        self.error_message = None
+        self.block_lines = None
+        self.base_seen = False
+        self.complete = False
+        
+    def feed(self, line):
+        '''
+        params line -> next line of the output including its line break
+        
+        returns boolean -> True when the first error block is complete
+        '''
+        
+        if self.complete:
+            
+            return True
+        
+        if self.block_lines is None:
+        
+            start = line.find(self.error_string)
+            
+            if start == -1:
+                
+                self.error_message = ''
+                
+                return False
+            
+            # the error message starts within the line and reaches up to its line break:
+            self.block_lines = [line[start:]]
+            
+        else:
+            
+            self.block_lines.append(line)
+            
+            # the line after the base context contains the rest of the input line: 
+            self.complete = self.base_seen or len(self.block_lines) >= self.max_block_lines
+            self.base_seen = self.base_context.match(line) is not None
+            
+        self.error_message = ''.join(self.block_lines)
+        
+        return self.complete
+    
+    
+class ErrorSignature:
+    '''
+    parsed error block of LogParser. The parts are compared by the equivalence policies instead of the 
+    raw text such that e. g. a shifted line number does not make the same error look different.
+    
+    params block -> error block as string
+    
+    attributes:
+    message -> first line of the block, e. g. '! Undefined control sequence.'
+    error_class -> message without '! ' where line numbers and whitespace are normalized
+    control_sequence -> the control sequence at which TeX stopped, e. g. '\\foo', None when the context 
+                        does not end with one
+    context -> tuple of the context lines without the line number and the indentation
+    line_number -> number of the input line of the error, None when the block contains none
+    '''
+    
+    context_start = re.compile(r'<[^>]*> |l\.\d+ |\\')
+    
+    def __init__(self, block):
+        
+        lines = block.split('\n')
+        
+        self.block = block
+        self.message = lines[0].rstrip()
+        
+        error_class = re.sub(r'\b(line|lines) \d+', r'\1 N', self.message[2:])
+        self.error_class = ' '.join(error_class.split())
+        
+        self.line_number = None
+        self.control_sequence = None
+        context = []
+        
+        in_context = False
+        
+        for line in lines[1:]:
+            
+            in_context = in_context or self.context_start.match(line) is not None
+            
+            if not in_context:
+                # further lines of the message, e. g. the help reference of LaTeX errors
+                
+                continue
+            
+            line_number = re.match(r'l\.(\d+) ', line)
+            
+            if line_number is not None:
+                
+                self.line_number = int(line_number.group(1))
+                line = line[line_number.end():]
+                
+            line = line.strip()
+            
+            if line == '' or line == '...':
+                
+                continue
+            
+            if len(context) == 0:
+                # TeX breaks the innermost context line right after the token at which it stopped:
+                
+                control_sequence = re.search(r'(\\[A-Za-z@]+|\\.)$', line)
+                
+                if control_sequence is not None:
                     
-        found = re.search(error_string, content)
-
-        if found is not None:
-
-            to = content[found.start():].index('\n') 
-            to += found.start()+1
-
-            error_message = content[found.start():to]
+                    self.control_sequence = control_sequence.group(1)
+                
+            context.append(line)
+            
+        self.context = tuple(context)
+        
+    def __repr__(self):
+        
+        return f'ErrorSignature({self.error_class!r}, control_sequence={self.control_sequence!r}, line_number={self.line_number})'
+    
+    
+# equivalence policies, each compares two ErrorSignature objects:
+equivalence_policies = {
+    'message': lambda a, b: a.message == b.message, # the raw first line, e. g. with its line numbers
+    'class': lambda a, b: a.error_class == b.error_class,
+    'control_sequence': lambda a, b: a.error_class == b.error_class and a.control_sequence == b.control_sequence,
+    'context': lambda a, b: a.error_class == b.error_class and a.context == b.context,
+}
 
-        else:
 
-            error_message = ''
+def same_error(error_message, error_message_stored):
+    '''
+    compares a found error block with the targeted one by the equivalence policy of the session.
+    
+    params:
+    error_message -> found error block as string, '' for no error, None when pdfLaTeX produced no output
+    error_message_stored -> the error block of the original .tex file
+    
+    returns boolean -> True when both are the same error
+    '''
+    
+    if not error_message or not error_message_stored:
+        
+        return error_message == error_message_stored
+    
+    return current_session().error_equivalence(ErrorSignature(error_message), ErrorSignature(error_message_stored))
+    
+    
+def latex_failure_check(log): 
+    '''
+    searches the .log content created by pdfLaTeX to get the error message.
+    
+    params log -> content of the .log file as string
+    
+    returns error_message -> found error block as string
+    
+    '''
+    
+    parser = LogParser()
+    
+    for line in log.splitlines(keepends=True):
+        
+        if parser.feed(line):
             
-    print('Found error:', error_message)
+            break
+            
+    error_message = parser.error_message or ''
     
     return error_message
 
@@ -621,27 +1098,147 @@ def closed_env_check(string):
 # In[28]:
 
 
-def prepare_ddmin(raw_string, curr_layer, problem_id):
-    ''' 
-    only runs for the first time when we start with a given .tex file
+def chunk_balance(text):
+    '''
+    counts the open brackets of a text part, comments and escaped characters are skipped.
     
-    params:
-    raw_string -> input string which represents the content of the .tex file
-    curr_layer -> integer which determines whether a new independent Docker image is created
-    problem_id -> integer which descirbes the storage location within an Docker image
+    params text -> string
     
-    returns:
-    front_skeleton -> preamble string list
-    center_content -> body string list
-    back_skeleton -> list with \\end{document} and rest of .tex file
-    nested_commands_center -> list over elements/commands of center_content describing whether these are nested
-    error_message_stored -> error message of the .tex file (this is used to compare it with the errors
-                            produced by modified versions)
+    returns tuple of the open curly brackets, environments, \\[ \\] and \\( \\) math environments and 
+    whether a $ math environment is open
     '''
     
-    # first check if there is the same number of beginning and ending commands of the environment. Do this
-    # because LaTeXWalker simply ignores the ending command (it cancels it) when no beloning beginning 
-    # command is given:
+    # line breaks go first, e. g. \\\\[2pt] is no display math and \\\\{ opens a bracket:
+    text = re.sub(r'\\\\', '', text)
+    text = re.sub(r'\\[{}$%]|(?<!\\)%[^\n]*', '', text)
+    
+    return (text.count('{') - text.count('}'), 
+            text.count('\\begin{') - text.count('\\end{'), 
+            text.count('\\[') - text.count('\\]'), 
+            text.count('\\(') - text.count('\\)'), 
+            text.count('$') % 2)
+
+
+def coarse_chunks(body, granularity='paragraph'):
+    '''
+    splits the body into lines or paragraphs. Neighbouring ones are joined until all brackets, 
+    environments and math environments opened within them are closed again, such that every chunk can be
+    removed without breaking the structure of the others. As whole lines are removed, no two lines are
+    joined, which keeps the line based checks like closed_env_check() valid.
+    
+    params:
+    body -> string between \\begin{document} and \\end{document}
+    granularity -> 'line' or 'paragraph', paragraphs are separated by empty lines
+    
+    returns chunks -> list of strings, joined they give the body
+    '''
+    
+    if granularity == 'line':
+        
+        pieces = body.splitlines(keepends=True)
+        
+    else:
+        # split in front of every empty line, so an empty line starts the following paragraph:
+        
+        pieces = [piece for piece in re.split(r'(?<=\n)(?=[ \t]*\n)', body) if piece != '']
+        
+    chunks = []
+    chunk = ''
+    
+    for piece in pieces:
+        
+        chunk += piece
+        
+        # whitespace is joined to the following chunk, e. g. the line break after \\begin{document} stays:
+        if chunk_balance(chunk) == (0, 0, 0, 0, 0) and chunk.strip() != '':
+            
+            chunks.append(chunk)
+            chunk = ''
+            
+    if chunk != '':
+        
+        chunks.append(chunk)
+        
+    return chunks
+
+
+def pre_reduction(raw_string, granularity='paragraph'):
+    '''
+    reduces the body of the .tex file coarsely before the structural ddmin: whole lines or paragraphs of
+    coarse_chunks() are removed by ddmin_minimal() while the error stays. These are only a few compiles 
+    compared to the deltas of all single nodes.
+    
+    params:
+    raw_string -> input string which represents the content of the .tex file
+    granularity -> 'line' or 'paragraph'
+    
+    returns raw_string -> the reduced string, unchanged when there is nothing to reduce
+    '''
+    
+    begin_pattern = '\\begin{document}'
+    begin_index = raw_string.find(begin_pattern)
+    end_index = raw_string.rfind('\\end{document}')
+    
+    if begin_index == -1 or end_index < begin_index or not closed_env_check(raw_string)[0]:
+        
+        return raw_string
+    
+    reduction_state.phase = 'original'
+    error_message_stored = latex_error_search(curr_delta=str('beginDelta'), curr_latex_string=raw_string)
+    
+    if not error_message_stored:
+        
+        return raw_string
+    
+    reduction_state.error_message = error_message_stored
+    
+    # the rest of the line of \\begin{document} stays, so no chunk is joined to that line:
+    body_start = begin_index + len(begin_pattern)
+    line_end = raw_string.find('\n', body_start, end_index)
+    
+    if line_end != -1:
+        
+        body_start = line_end + 1
+    
+    front = raw_string[:body_start]
+    back = raw_string[end_index:]
+    chunks = coarse_chunks(raw_string[body_start:end_index], granularity)
+    
+    delta_id_list = ['C' + str(i) for i in range(len(chunks))]
+    delta_buffer = DeltaBuffer([front], chunks, [back], delta_id_list)
+    
+    current = ddmin_minimal(delta_id_list, delta_buffer.document_of, error_message_stored, 'coarse')
+    
+    if current == []:
+        # the error lies outside the body, this is left to the structural ddmin
+        
+        return raw_string
+    
+    return delta_buffer.document_of(current)
+    
+
+
+def prepare_ddmin(raw_string, curr_layer, problem_id):
+    ''' 
+    only runs for the first time when we start with a given .tex file
+    
+    params:
+    raw_string -> input string which represents the content of the .tex file
+    curr_layer -> integer which determines whether a new independent Docker image is created
+    problem_id -> integer which descirbes the storage location within an Docker image
+    
+    returns:
+    front_skeleton -> preamble string list
+    center_content -> body string list
+    back_skeleton -> list with \\end{document} and rest of .tex file
+    nested_commands_center -> list over elements/commands of center_content describing whether these are nested
+    error_message_stored -> error message of the .tex file (this is used to compare it with the errors
+                            produced by modified versions)
+    '''
+    
+    # first check if there is the same number of beginning and ending commands of the environment. Do this
+    # because LaTeXWalker simply ignores the ending command (it cancels it) when no beloning beginning 
+    # command is given:
     boolean, env_type = closed_env_check(raw_string)
     
     if not boolean:
@@ -650,14 +1247,13 @@ def prepare_ddmin(raw_string, curr_layer, problem_id):
     
     
     # create .log file with error message:
-    log_file_image_path_full_file, container_name, project_folder = docker_organizer(curr_delta=str('beginDelta'),curr_latex_string=raw_string, problem_id=0, first_run=True)
+    reduction_state.phase = 'original'
+    error_message_stored = latex_error_search(curr_delta=str('beginDelta'), curr_latex_string=raw_string)
     
     # look for the error within the log file:
-    if log_file_image_path_full_file == '':
+    if error_message_stored is None:
         
         raise Exception('Input tex file produces no .log file when using pdfLaTeX. Unusual error!')
-
-    error_message_stored = latex_failure_check(log_file_image_path_full_file, container_name, project_folder)
     
     if error_message_stored == '':
         
@@ -951,6 +1547,142 @@ def env_enterer(front_skeleton, center_content, back_skeleton, env_position):
 # In[31]:
 
 
+class DeltaBuffer:
+    '''
+    one immutable string of the front skeleton, the deltas and the back skeleton of ddmin(). The deltas are
+    kept as (start, end) spans into it. As the triangles of ddmin() are neighbouring deltas, every triangle 
+    is a single span and its LaTeX string is only assembled when it is compiled.
+    
+    params:
+    front_skeleton -> list of strings in front of the deltas
+    center_content -> list of the deltas
+    back_skeleton -> list of strings after the deltas
+    delta_id_list -> list which enumerates the deltas
+    '''
+    
+    def __init__(self, front_skeleton, center_content, back_skeleton, delta_id_list):
+        
+        self.front_skeleton = front_skeleton
+        self.back_skeleton = back_skeleton
+        self.front = ''.join(front_skeleton)
+        self.back = ''.join(back_skeleton)
+        self.source = self.front + ''.join(center_content) + self.back
+        self.spans = {}
+        
+        start = len(self.front)
+        self.center_start = start
+        
+        for delta_id, delta in zip(delta_id_list, center_content):
+            
+            self.spans[delta_id] = (start, start + len(delta))
+            start += len(delta)
+            
+    def span(self, delta_combi_triangle_list):
+        '''
+        returns (start, end) of the neighbouring deltas of delta_combi_triangle_list within the source
+        '''
+        
+        if len(delta_combi_triangle_list) == 0:
+            
+            return self.center_start, self.center_start
+        
+        return self.spans[delta_combi_triangle_list[0]][0], self.spans[delta_combi_triangle_list[-1]][1]
+    
+    def document(self, span):
+        '''
+        returns the whole LaTeX string with the deltas of span as center
+        '''
+        
+        start, end = span
+        
+        document = io.StringIO()
+        document.write(self.front)
+        document.write(self.source[start:end])
+        document.write(self.back)
+        
+        return document.getvalue()
+    
+    def document_of(self, delta_combi_list):
+        '''
+        returns the whole LaTeX string with the deltas of delta_combi_list as center, they do not have to be
+        neighbours
+        '''
+        
+        document = io.StringIO()
+        document.write(self.front)
+        
+        for delta_id in delta_combi_list:
+            
+            start, end = self.spans[delta_id]
+            document.write(self.source[start:end])
+            
+        document.write(self.back)
+        
+        return document.getvalue()
+        
+
+def ddmin_triangles(center_content, delta_id_list, p_str):
+    '''
+    splits the center_content of one ddmin round into the triangles (deltas) to test. They are yielded in 
+    the order in which ddmin() tests them: the parts of the split center_content first and the blank body
+    afterwards.
+    
+    params:
+    center_content -> list of commmands/deltas of the current round
+    delta_id_list -> list which enumerates the deltas/elements of center_content
+    p_str -> 'P' when the deltas belong to the preamble, else ''
+    
+    yields:
+    center_content_triangle -> the part of center_content to test
+    delta_combi_triangle_list -> the enumeration of center_content_triangle
+    delta_combi_triangle -> center_content_triangle its enumeration as one string
+    biggest_ind -> index in center_content where center_content_triangle stops
+    '''
+    
+    divider = 2
+    divider_multiplier = 1
+    biggest_ind = 0        
+    last_run = False
+    
+    while biggest_ind < len(center_content) or not last_run: 
+
+        smallest_ind = biggest_ind # the previous biggest_ind
+
+        # first time we start this loop, we check the blank body, after that we check for the 
+        # center parts (deltas) which result from a split:
+        if biggest_ind >= len(center_content):
+
+            smallest_ind = 0
+            biggest_ind = 0
+            last_run = True
+
+        else:
+
+            biggest_ind = divider_multiplier * (max(len(center_content) // divider, 1)) 
+            divider_multiplier += 1
+
+
+        if biggest_ind >= len(center_content):
+
+            center_content_triangle = center_content[smallest_ind:]   
+            delta_combi_triangle_list = delta_id_list[smallest_ind:]
+
+        else:
+
+            center_content_triangle = center_content[smallest_ind : biggest_ind]  
+            delta_combi_triangle_list = delta_id_list[smallest_ind : biggest_ind]
+
+
+        # bring active center part to one string:
+        delta_combi_triangle = ''.join(delta_combi_triangle_list)
+
+        if delta_combi_triangle == '':
+
+            delta_combi_triangle = p_str + 'blankBody'
+            
+        yield center_content_triangle, delta_combi_triangle_list, delta_combi_triangle, biggest_ind
+        
+
 def ddmin(front_skeleton, center_content, back_skeleton, error_message_stored, curr_layer, problem_id, delta_ids=None):
     '''
     implements the ddmin algorithm.
@@ -1010,123 +1742,79 @@ def ddmin(front_skeleton, center_content, back_skeleton, error_message_stored, c
     
     env_entered = False 
     env_finished = False
+    
+    delta_buffer = DeltaBuffer(front_skeleton, center_content, back_skeleton, delta_id_list)
+    level = 0
         
         
     while True:
         
         broken = False
+        level += 1
+        reduction_state.phase = f'ddmin level {level}'
         
-        divider = 2
-        divider_multiplier = 1
-        biggest_ind = 0        
-        
-        ''' 
-        multi-processing idea:
-        run several pdfLaTeX processes in parallel to save time. 
-        
-        from multiprocessing import Process
-        
-        def errorSearchFunctionCombiner(args....):
-        
-            a = docker_organizer(...)
-            error_message = latex_failure_check(a)
-            return error_message
-        
-        def parallelErrorSearch(*triangles_info):
-        
-            proc = []
-            
-            for triangle_info in triangles_info:
+        if front_skeleton is not delta_buffer.front_skeleton or back_skeleton is not delta_buffer.back_skeleton:
+            # the skeletons were changed by entering a definition, the deltas are new ones
             
-                p = Process(target=errorSearchFunctionCombiner, args=(triangle_info,))
-                p.start()
-                proc.append(p)
-                
-            for p in proc:
-            
-                p.join()
+            delta_buffer = DeltaBuffer(front_skeleton, center_content, back_skeleton, delta_id_list)
         
-        '''
-
+        # all triangles of this round are known in advance. In the parallel mode they are compiled at 
+        # the same time by the compile_pool, the results are still taken over in the order below such 
+        # that the outcome is the same as in the serial mode:
+        prefetched = {}
         
-        first_run = True
-        last_run = False
-
-        # loop over the center content, cut it into deltas and test them:
-        while biggest_ind < len(center_content) or not last_run: # go over all triangles
-
-            smallest_ind = biggest_ind # the previous biggest_ind
+        if current_session().compile_pool is not None:
             
-            # first time we start this loop, we check the blank body, after that we check for the 
-            # center parts (deltas) which result from a split:
-            if biggest_ind >= len(center_content):
-                
-                smallest_ind = 0
-                biggest_ind = 0
-                last_run = True
-
-            else:
-
-                biggest_ind = divider_multiplier * (max(len(center_content) // divider, 1)) 
-                divider_multiplier += 1
-              
+            candidates = []
             
-            if biggest_ind >= len(center_content):
+            for center_content_triangle, delta_combi_triangle_list, delta_combi_triangle, biggest_ind in ddmin_triangles(center_content, delta_id_list, p_str):
+                
+                if delta_combi_triangle not in triangle_delta_combi_history.keys() and delta_combi_triangle not in {candidate[0] for candidate in candidates}:
                     
-                center_content_triangle = center_content[smallest_ind:]   
-                delta_combi_triangle_list = delta_id_list[smallest_ind:]
-
-            else:
-
-                center_content_triangle = center_content[smallest_ind : biggest_ind]  
-                delta_combi_triangle_list = delta_id_list[smallest_ind : biggest_ind]
+                    candidates.append((delta_combi_triangle, delta_buffer.document(delta_buffer.span(delta_combi_triangle_list)), delta_combi_triangle_list))
+                    
+                if len(center_content_triangle) == 0:
+                    # the blank body always decides the round
+                    
+                    break
+                    
+            prefetched = oracle_prefetch(candidates)
 
-                
-            # bring active center part to one string:
-            delta_combi_triangle = ''.join(delta_combi_triangle_list)
-            
-            if delta_combi_triangle == '':
-                
-                delta_combi_triangle = p_str + 'blankBody'
+        # loop over the center content, cut it into deltas and test them:
+        for center_content_triangle, delta_combi_triangle_list, delta_combi_triangle, biggest_ind in ddmin_triangles(center_content, delta_id_list, p_str): # go over all triangles
                 
             # When this delta was already used, go to next center part to try out in this while loop:
             if delta_combi_triangle in triangle_delta_combi_history.keys():
                 
                 continue # the rest round of this inner while loop can be ignored, jump to next triangle
 
-            # add active center (deltas) to history, to avoid second check:
-            triangle_delta_combi_history[delta_combi_triangle] = center_content_triangle
+            # add active center (deltas) to history, to avoid second check, only its span is stored:
+            triangle_span = delta_buffer.span(delta_combi_triangle_list)
+            triangle_delta_combi_history[delta_combi_triangle] = triangle_span
             
 
             # build whole LaTeX string to check on with current center content:
-            triangle = ''.join(front_skeleton + center_content_triangle + back_skeleton)
+            triangle = delta_buffer.document(triangle_span)
             
-
-            '''
-            for multi-processing we would collect all the info from the loop above in lists and leave the 
-            loop now. The following code would be executed in parallel for all triangles to search for the 
-            error in parallel. When we found the error we should take a triangle for which it is happening
-            to further work with in the ddmin function. The rest shall be ignored.
+            # try to create pdf via pdflatex and check it for failures:
+            error_message = oracle_result(prefetched, delta_combi_triangle, triangle, delta_combi_triangle_list)
             
-            same can be done for complements.
-            '''
+            if error_message is None or same_error(error_message, error_message_stored) or len(center_content_triangle) == 0:
+                # the triangle decides the round, the other running tests are not needed any longer
+                
+                oracle_cancel(prefetched)
             
-            # try to create pdf via pdflatex and check it for failures:
-
-            log_file_image_path, container_name, project_folder = docker_organizer(curr_delta=delta_combi_triangle, curr_latex_string=triangle, problem_id=problem_id)
             # look for the error within the log file:
-            if log_file_image_path == '':
+            if error_message is None:
                 # no log file generated
                 
                 break
-                
-            error_message = latex_failure_check(log_file_image_path, container_name, project_folder)
 
             # error still there, so error in the current delta, split it again into two to find precise
             # error position. Enter this loop again with the current center content as the new center 
             # content to split:
 
-            if error_message == error_message_stored: # case a) reduce to subset
+            if same_error(error_message, error_message_stored): # case a) reduce to subset
 
                 # when we have a blank body file but still the same error, ddmin is returns with the 
                 # message that error outside body:
@@ -1197,16 +1885,11 @@ def ddmin(front_skeleton, center_content, back_skeleton, error_message_stored, c
                 center_content = center_content_triangle
 
                 delta_id_list = delta_combi_triangle_list
-                divider = 2
-                divider_multiplier = 1
-                biggest_ind = 0
-                # divider, biggest_ind, and dividider_multiplier are already intitalized correctly at beginning
-                # of while loop.   
                 
                 broken = True
                 break
                 
-            elif error_message != error_message_stored and len(center_content_triangle) == 0:
+            elif not same_error(error_message, error_message_stored) and len(center_content_triangle) == 0:
                 # in the previous round we had the center content of length 1 with a failing delta,
                 # center_content=[failing_delta]. We split it up into center content parts to loop over,
                 # [] and [failing_delta]. 
@@ -1226,191 +1909,2214 @@ def ddmin(front_skeleton, center_content, back_skeleton, error_message_stored, c
                 # returns failing list.      
 
 
-# In[32]:
-
-
-img_counter = 0
-img_str = ''
-
-def docker_organizer(curr_delta, curr_latex_string, problem_id=0, first_run=False):
+def ddmin_minimal(delta_id_list, document_of, error_message_stored, test_name):
     '''
-    creates Dockerfiles, creates Docker image, and runs pdfLaTeX within Docker image to store the resulting
-    .log file within that Docker image.
+    implements the complete ddmin algorithm of Zeller and Hildebrandt. Unlike ddmin() also the complements
+    are tested (case b) and the number of parts is doubled when no part and no complement fails (case c).
+    So, also errors which need several deltas at the same time are found, e. g. a \\newcommand and the
+    wrong usage of the defined command. The result is 1-minimal: removing any further delta makes the 
+    error disappear.
     
-    Docker file: file which contains instructions about installations and processes
-    Image: compiled Docker file. 
-    Container: instance of an image, is the virtual operating system.
-      
     params:
-    curr_delta -> the active delta enumeration. It is taken to formulate a name for the created .log file
-    curr_latex_string -> string which contains the whole code to convert by pdfLaTeX
-    problem_id -> defines the storage location of the pdfLaTeX outcome files
-    first_run -> boolean when True new, independent image is built, else the current images relies on the 
-                 independent image
+    delta_id_list -> list which enumerates the deltas, the elements have to be hashable
+    document_of -> function which returns the whole LaTeX string for a list of delta ids
+    error_message_stored -> the error message of the original .tex file which we aim for
+    test_name -> start of the names of the tests, they are enumerated
     
-    returns:
-    log_file_image_path -> the path where the .log file is stored within the Docker image
-    container_name -> the name of the Docker container which is an instance of the current Docker image
-    project_folder -> the folder which is the working directory of the created Docker image and which will
-                      also be used as the host location in latex_failure_check()   
+    returns current -> 1-minimal list of delta ids, [] when the error also appears without any delta
     '''
-    print('######################################################')
-    print('docker_organizer(): Convert following string with pdfLaTeX:\n', curr_latex_string)
-
-    container_name =  f'latex_container_{int(time.time())}' 
-    project_folder = 'project_folder'
-    global img_counter
-    global img_str
-
-    if first_run:
-        # create the folders when running for a .tex file the first time at all
+    
+    tested = {} # frozenset of delta ids -> boolean, True when the error appears
+    test_names = {} # frozenset of delta ids -> name of its test
+    test_counter = itertools.count()
+    
+    def fails(delta_combi_list, prefetched):
         
-        if os.path.exists(project_folder):
-            
-            shutil.rmtree(project_folder)
-
-        os.makedirs(project_folder, exist_ok=True)
+        key = frozenset(delta_combi_list)
         
-        img_counter = 0
-        img_str = ''
+        if key not in tested:
+            
+            error_message = oracle_result(prefetched, test_names[key], document_of(delta_combi_list), delta_combi_list)
+            
+            tested[key] = error_message is not None and same_error(error_message, error_message_stored)
+            
+        return tested[key]
     
-        curr_image_title = 'ubuntu:latest'# 'ubuntu:18.04'   
+    def run_tests(test_lists):
+        # returns the first test which fails, the tests are compiled at the same time in the parallel mode
         
-    elif img_counter % (31 - 7) == 0: 
-        # in Docker the maximal depth can be exceeded. Therefore, create new, independent Docker image.
+        prefetched = {}
         
-        first_run = True
-        img_str = str(img_counter) # modify img_str such that new image type can be created
+        for delta_combi_list in test_lists:
             
-        curr_image_title = 'imagename' + img_str 
+            test_names.setdefault(frozenset(delta_combi_list), f'{test_name}{next(test_counter)}')
         
-    else:
+        if current_session().compile_pool is not None:
+            
+            candidates = [(test_names[frozenset(delta_combi_list)], document_of(delta_combi_list), delta_combi_list) 
+                          for delta_combi_list in test_lists if frozenset(delta_combi_list) not in tested]
+            prefetched = oracle_prefetch(candidates)
+            
+        for delta_combi_list in test_lists:
+            
+            if fails(delta_combi_list, prefetched):
+                
+                oracle_cancel(prefetched)
+                
+                return delta_combi_list
+            
+        return None
+    
+    phase_name = test_name.rstrip('_')
+    
+    # the error may not depend on any delta at all:
+    reduction_state.phase = f'{phase_name} empty'
+    
+    if run_tests([[]]) is not None:
         
-        curr_image_title = 'imagename' + img_str 
-                            
-    img_counter += 1
+        return []
     
-    os.makedirs(project_folder + '/' + curr_delta, exist_ok=True)
-
+    current = list(delta_id_list)
+    n = 2
     
-    with open(f'{project_folder}/{curr_delta}/{curr_delta}.tex', 'w') as g:
-        g.write(curr_latex_string)
-
-    # Docker File:
-    with open(f'{project_folder}/{curr_delta}Dockerfile', 'w') as f:
+    while len(current) >= 2:
         
-        # write header with current image title:
-        f.write(f'FROM ubuntu:latest \n\n')
-        #f.write(f'FROM ubuntu:18.04 \n\n') # this Docker file refers to image with the name ubuntu:18.04
-        # such that there is no need of installation of TeX every time
-
-        f.write(f'RUN apt-get update && apt-get install -y texlive \n')
-        # the texlive package also contains pdfLaTeX
-
-        # use RUN to execute the commands from inside of container:
-        if first_run: 
-
-            f.write(f'RUN mkdir /home/{project_folder} && \ \n')
-            f.write(f'mkdir /home/{project_folder}/{str(problem_id)}{str(problem_id)} \n')
+        reduction_state.phase = f'{phase_name} granularity {n}'
         
-        f.write(f'WORKDIR /home/{project_folder} \n') # set working directory
+        # split current into n parts of almost the same size:
+        parts = [current[(i * len(current)) // n : ((i + 1) * len(current)) // n] for i in range(n)]
+        parts = [part for part in parts if len(part) > 0]
         
-        # copy the local .tex file on host to the image:
-        f.write(f'COPY ./{curr_delta}/{curr_delta}.tex ./{str(problem_id)}{str(problem_id)} \n')
-        # the .tex file to copy has to be placed in the cwd directory of the Docker build command. 
-
-        # create the .pdf file:
-        f.write(f'RUN pdflatex -interaction=nonstopmode -output-directory ./{str(problem_id)}{str(problem_id)} ./{str(problem_id)}{str(problem_id)}/{curr_delta}.tex 2>&1 | tee ./{str(problem_id)}{str(problem_id)}/{curr_delta}.log \n  ')
-        # 2>&1 | tee ./00/begin2.log to run the command even when an error appears, through that we can generate the .log file which points out the searched error
-
-    # collect log file paths:
-    log_file_image_path = f'/home/{project_folder}/{str(problem_id)}{str(problem_id)}/{curr_delta}.log'
-
-    if not first_run:
-        # remove unused images
+        # case a) reduce to subset:
+        found = run_tests(parts)
         
-        command_docker = 'docker image prune --force'
-        subprocess.run(command_docker, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-
-    
-    # build inital image (lower directory; read only):
-    subprocess.run(['docker', 'build', '-t', curr_image_title, '-f', f'{project_folder}/{curr_delta}Dockerfile', f'{project_folder}'])
-    # builds a new image layer based on existing base image (overlay file system)
+        if found is not None:
+            
+            current = found
+            n = 2
+            
+            continue
         
-    # create Docker container:
-    subprocess.run(['docker', 'run', '-it','--name', container_name, '-p', '0:80', '-d', curr_image_title])
-    # port 0: A random free port from 1024 to 65535 will be selected. 
-    # A port in computer software is when a piece of software has been translated or converted to run 
-    # on different hardware or operating system (OS) than it was originally designed for.
-    # the container is only an instance of an image.
-
-    subprocess.run(['docker', 'run', '-v',  f'{os.path.abspath("")}/{project_folder}:/home/{project_folder}', curr_image_title])
-
-    return log_file_image_path, container_name, project_folder
-
-
-# In[33]:
+        # case b) reduce to complement, for two parts the complements are the parts themselves:
+        if n > 2:
+            
+            complements = [[delta_id for delta_id in current if delta_id not in part] for part in parts]
+            found = run_tests(complements)
+            
+            if found is not None:
+                
+                current = found
+                n = max(n - 1, 2)
+                
+                continue
+        
+        # case c) increase granularity:
+        if n >= len(current):
+            
+            break
+        
+        n = min(len(current), 2 * n)
+        
+    return current
 
 
-def ddmin_connected(file_name):
+def probdd_minimal(delta_id_list, document_of, error_message_stored, test_name, p_initial=0.1):
     '''
-    is called by the user to start the process.
+    implements probabilistic delta debugging (ProbDD). Every delta has a probability to be needed for the 
+    error. In every step the deltas with the smallest probabilities are removed, as many as maximize the 
+    expected number of removed deltas: len(removal) * product of (1 - p). When the error stays, they are 
+    removed for good. Else the probabilities of the removed deltas are raised by Bayes' rule, a single 
+    delta gets the probability 1. The algorithm stops when all remaining deltas have the probability 1.
     
     params:
-    file_name -> the path including the .tex file to process
-    user -> the logged-in user of the current computer
-    password -> the password for the user to give permission for initial Docker runs
+    delta_id_list -> list which enumerates the deltas, the elements have to be hashable
+    document_of -> function which returns the whole LaTeX string for a list of delta ids
+    error_message_stored -> the error message of the original .tex file which we aim for
+    test_name -> start of the names of the tests, they are enumerated
+    p_initial -> probability of every delta to be needed at the start
     
-    returns:
-    ddmin_loop() -> function call to go to the next process step
+    returns current -> list of the needed delta ids, [] when the error also appears without any delta
     '''
     
-    # open the file as string:
-    raw_string = open_full_file_as_string(file_name=file_name)
-    
-    front_skeleton, center_content, back_skeleton, nested_commands_center, error_message_stored = prepare_ddmin(raw_string, curr_layer=0, problem_id=0)
+    tested = {} # frozenset of delta ids -> boolean, True when the error appears
+    test_counter = itertools.count()
     
-    if isinstance(front_skeleton, str):
+    def fails(delta_combi_list):
         
-        return front_skeleton
-    
-    first_front_skeleton = front_skeleton
-    first_back_skeleton = back_skeleton
-
-    if center_content == []:
-        # as described above the \begin{document} AND/OR maybe \end{document} are missing.
+        key = frozenset(delta_combi_list)
         
-        return 'The \\begin{document} and/or \\end{document} are missing!'
-
-    return ddmin_loop(front_skeleton, center_content, back_skeleton, nested_commands_center, error_message_stored, first_front_skeleton, first_back_skeleton)
-    
-def ddmin_loop(front_skeleton, center_content, back_skeleton, nested_commands_center, error_message_stored, first_front_skeleton, first_back_skeleton):
-    '''
-    organizes the process by running the ddmin() algorithm and reacting to its output statement.
+        if key not in tested:
+            
+            error_message = latex_error_search(curr_delta=f'{test_name}{next(test_counter)}', curr_latex_string=document_of(delta_combi_list), 
+                                               delta_ids=delta_combi_list)
+            
+            tested[key] = error_message is not None and same_error(error_message, error_message_stored)
+            
+        return tested[key]
     
-    params:
-    front_skeleton -> preamble/front skeleton in front of the center of interest/center_content
-    center_content -> list with current deltas of interest, body or content of nested command
-    back_skeleton -> back skeleton after the center of interest/center_content
-    nested_commands_center -> list refering to the elements/deltas of center_content informing whether the
-                              deltas are nested (True) or not (False)
-    error_message_stored -> the error message produced by the original .tex file which we target on
-    first_front_skeleton -> unmodified front skeleton to perceive the valid .tex structure
-    first_back_skeleton -> unmodified back skeleton to perceive the valid .tex structure
+    reduction_state.phase = test_name
     
-    returns final_latex -> the final LaTeX code output presented as a string, concretizing the error 
-                           location
-    '''
+    # the error may not depend on any delta at all:
+    if fails([]):
+        
+        return []
     
-    first_time_outside = True
-    looper = True
-    env_begins = True # mark if we want the {begins} or the {ends} of the newenvironment
-    front_ind = 0
+    current = list(delta_id_list)
+    probability = {delta_id: p_initial for delta_id in current}
     
     while True:
+        
+        # the deltas which may still be removed, the most probably unneeded ones first:
+        candidates = sorted((delta_id for delta_id in current if probability[delta_id] < 1), key=lambda delta_id: probability[delta_id])
+        
+        if len(candidates) == 0:
+            
+            break
+        
+        best_gain = 0
+        best_size = 1
+        keep_probability = 1 # probability that all deltas of the removal are unneeded
+        
+        for size, delta_id in enumerate(candidates, 1):
+            
+            keep_probability *= 1 - probability[delta_id]
+            
+            if size * keep_probability > best_gain:
+                
+                best_gain = size * keep_probability
+                best_size = size
+                
+        removal = set(candidates[:best_size])
+        remaining = [delta_id for delta_id in current if delta_id not in removal]
+        
+        if fails(remaining):
+            
+            current = remaining
+            
+        else:
+            # at least one of the removed deltas is needed:
+            
+            removal_probability = 1
+            
+            for delta_id in removal:
+                
+                removal_probability *= 1 - probability[delta_id]
+            
+            for delta_id in removal:
+                
+                probability[delta_id] = 1 if len(removal) == 1 else min(1, probability[delta_id] / (1 - removal_probability))
+                
+    return current
+
+
+def preamble_split(front_skeleton):
+    '''
+    splits the front skeleton of the body into its single commands, e. g. when the error lies outside 
+    the skeleton center in ddmin_loop().
+    
+    params front_skeleton -> preamble string list which ends with \\begin{document}
+    
+    returns:
+    f1 -> list of the commands up to \\documentclass, a message string when the split fails
+    center_content -> list of the commands of the preamble after \\documentclass
+    nested_commands_center -> list refering to the elements of center_content whether they are nested
+    begin_commands -> list of the commands which contain \\begin{document}
+    '''
+    
+    center_content = []
+    nested_commands_center = []
+    begin_commands = []
+    f1 = []
+
+    for command in front_skeleton:
+        
+        command_list, start_content_ind, end_content_ind, nested_commands_delta = commandlist_finder(command, '')
+
+        if isinstance(command_list, str):
+            
+            return command_list, None, None, None
+        
+        for c_ind, command in enumerate(command_list):
+            
+            if '\\documentclass' in command or f1 == []:
+                # all commands before \\documentclass get stored in front skeleton
+                
+                if f1 == [] and (not command.startswith('%') and not '\\documentclass' in command):
+                    
+                    return 'Final output: command before \\documentclass or \\documentclass missing/mis-spelled.', None, None, None
+                
+                f1.append(command)
+                
+            elif '\\begin{document}' in command:
+                
+                begin_commands.append(command)
+                
+            else:
+                
+                center_content.append(command)
+                nested_commands_center.append(nested_commands_delta[c_ind])
+                
+    return f1, center_content, nested_commands_center, begin_commands
+
+
+def reduce_preamble(front_skeleton, center_content, back_skeleton, current, error_message_stored, minimal, test_name):
+    '''
+    runs a reduction like ddmin_minimal() over the commands of the preamble together with the needed deltas 
+    of the body. So, e. g. a \\newcommand in the preamble and its wrong usage in the body are kept while 
+    all other commands of the preamble are removed. The preamble is split by preamble_split(), its commands 
+    of whitespace only are always kept, they would only cost tests. The reduced preamble replaces the 
+    content of the front_skeleton list in place, like ddmin_loop() extends the back_skeleton.
+    
+    params:
+    front_skeleton, center_content, back_skeleton, error_message_stored, minimal, test_name -> like 
+    reduce_center(), the front_skeleton ends with \\begin{document}
+    current -> the needed delta ids of the body, found with the whole preamble
+    
+    returns current -> the needed delta ids of the body, unchanged when the preamble can not be reduced
+    '''
+    
+    f1, preamble_commands, nested_commands_preamble, begin_commands = preamble_split(front_skeleton)
+    
+    if isinstance(f1, str):
+        
+        return current
+    
+    preamble_ids = [f'P{i}' for i, command in enumerate(preamble_commands) if command.strip() != '']
+    
+    def front_of(kept):
+        
+        return ''.join(f1 + [command for i, command in enumerate(preamble_commands) if command.strip() == '' or f'P{i}' in kept] + begin_commands)
+    
+    def document_of(kept):
+        
+        kept = set(kept)
+        body = [center_content[int(delta_id)] for delta_id in current if delta_id in kept]
+        
+        return ''.join([front_of(kept)] + body + back_skeleton)
+    
+    kept = minimal(preamble_ids + current, document_of, error_message_stored, test_name + 'Preamble')
+    kept_body = [delta_id for delta_id in kept if delta_id in current]
+    
+    if kept_body == []:
+        # the error would only come from the reduced preamble, the reduction of the body is taken
+        
+        return current
+    
+    front_skeleton[:] = [front_of(set(kept))]
+    
+    return kept_body
+
+
+def reduce_center(front_skeleton, center_content, back_skeleton, error_message_stored, minimal, test_name):
+    '''
+    runs a reduction like ddmin_minimal() on the center_content and words the outcome like ddmin(). On the 
+    body, the preamble is afterwards reduced together with the needed deltas by reduce_preamble().
+    
+    params:
+    front_skeleton, center_content, back_skeleton, error_message_stored -> like ddmin()
+    minimal -> function like ddmin_minimal() which returns the needed delta ids
+    test_name -> start of the names of the tests
+    
+    returns:
+    center_content -> the deltas which lead to the error
+    delta_id_list -> the enumeration of center_content
+    statement -> 'error outside skeleton center' when the error also appears without any delta, 
+                 'error for the given delta' for one delta, 'error for cooperating deltas' for several
+    '''
+    
+    p_str = '' if len(front_skeleton) > 0 else 'P'
+    delta_id_list = [p_str + str(i) for i in range(0, len(center_content))]
+    delta_buffer = DeltaBuffer(front_skeleton, center_content, back_skeleton, delta_id_list)
+    
+    current = minimal(delta_id_list, delta_buffer.document_of, error_message_stored, p_str + test_name)
+    
+    if current == []:
+        
+        return [], [], 'error outside skeleton center'
+    
+    if len(front_skeleton) > 0 and front_skeleton[-1].endswith('\\begin{document}'):
+        # the body, the commands of the preamble are reduced together with the needed deltas
+        
+        current = reduce_preamble(front_skeleton, center_content, back_skeleton, current, error_message_stored, minimal, test_name)
+        
+    center_content = [center_content[delta_id_list.index(delta_id)] for delta_id in current]
+    
+    if len(current) == 1:
+        
+        return center_content, current, 'error for the given delta'
+    
+    return center_content, current, 'error for cooperating deltas'
+
+
+def ddmin_complements(front_skeleton, center_content, back_skeleton, error_message_stored, curr_layer, problem_id, delta_ids=None):
+    '''
+    runs ddmin_minimal() on the center_content, takes and returns the same as ddmin() but does not enter 
+    definitions like env_enterer(). Several deltas which are only together needed for the error are 
+    returned with the statement 'error for cooperating deltas'.
+    
+    On the body, the commands of the preamble are then reduced together with the needed deltas, so e. g. 
+    of a \\newcommand in the preamble and its wrong usage in the body only these two are kept.
+    '''
+    
+    return reduce_center(front_skeleton, center_content, back_skeleton, error_message_stored, ddmin_minimal, 'ddmin')
+
+
+def ddmin_probabilistic(front_skeleton, center_content, back_skeleton, error_message_stored, curr_layer, problem_id, delta_ids=None):
+    '''
+    runs probdd_minimal() on the center_content, takes and returns the same as ddmin_complements().
+    '''
+    
+    return reduce_center(front_skeleton, center_content, back_skeleton, error_message_stored, probdd_minimal, 'probdd')
+
+
+def hierarchical_ddmin(tree, error_message_stored):
+    '''
+    hierarchical delta debugging (HDD): runs ddmin_minimal() level by level over the node tree of the 
+    .tex file instead of ddmin_loop(). The first level are the top nodes of the file, e. g. the preamble 
+    commands and the document environment. The next level are the children of the nodes which were kept: 
+    the content of environments, groups and math environments and the arguments of macros and 
+    definitions. A removed node is never looked at again, together with all nodes within it. Nodes of 
+    whitespace only are always kept, they would only cost tests.
+    
+    params:
+    tree -> DocumentTree of the .tex file
+    error_message_stored -> the error message of the original .tex file which we aim for
+    
+    returns final_latex -> the .tex file without the removed nodes
+    '''
+    
+    removed = []
+    level = tree.roots
+    depth = 0
+    
+    while True:
+        
+        level = [span for span in level if tree.source[span[0]:span[1]].strip() != '']
+        
+        if len(level) == 0:
+            
+            break
+        
+        def document_of(kept, level=level):
+            
+            kept = set(kept)
+            
+            return tree.document_without(removed + [span for span in level if span not in kept])
+        
+        kept = ddmin_minimal(level, document_of, error_message_stored, f'hdd{depth}_')
+        kept_set = set(kept)
+        
+        removed.extend(span for span in level if span not in kept_set)
+        level = [child for span in kept for child in tree.children.get(span, [])]
+        depth += 1
+        
+    return tree.document_without(removed)
+
+
+# ddmin strategies of ddmin_loop(), each takes and returns the same as ddmin():
+ddmin_strategies = {
+    'subset': ddmin, # only case a), fast for the usual single-delta errors
+    'complements': ddmin_complements, # complete ddmin, for errors of several deltas
+    'probdd': ddmin_probabilistic, # probabilistic delta debugging, mostly fewer tests than ddmin
+}
+
+
+# In[32]:
+
+
+class CompileResult:
+    '''
+    structured outcome of one pdfLaTeX run of a compiler backend.
+    
+    params:
+    error_message -> first error message in the output of pdfLaTeX, '' when there is none, None when 
+                     pdfLaTeX produced no output at all
+    returncode -> exit code of pdfLaTeX, None when the run was stopped by its timeout
+    duration -> wall time of the compile in seconds, without the reading of the .log file
+    backend -> name of the backend which compiled the string
+    log_time -> seconds of reading the .log file after the run, None when the output was read instead
+    '''
+    
+    def __init__(self, error_message, returncode, duration, backend, log_time=None):
+        
+        self.error_message = error_message
+        self.returncode = returncode
+        self.duration = duration
+        self.backend = backend
+        self.log_time = log_time
+        
+    def __repr__(self):
+        
+        return f'CompileResult(backend={self.backend!r}, returncode={self.returncode}, duration={self.duration:.3f}, error_message={self.error_message!r})'
+
+
+class CompileJob:
+    '''
+    one prepared pdfLaTeX run of a compiler backend. The .tex file is already written, the process 
+    described by argv and cwd only has to be started. The output of the 
+    process is read by the LogParser of the job. Only when a log_path is given, the .log file is read 
+    after the run instead, e. g. for pdfLaTeX in batch mode which prints nothing.
+    
+    params:
+    argv -> list with the command and its arguments which runs pdfLaTeX
+    cwd -> working directory of the process, None for the current one
+    backend -> name of the backend which prepared the job
+    work_dir -> directory which is removed when the job is finished, None to keep everything
+    log_path -> .log file on the host which is read when the run is finished, None to read the output
+    stop_argv -> command which stops pdfLaTeX where killing the started process is not enough, e. g. 
+                 within a Docker container, None for none
+    '''
+    
+    def __init__(self, argv, cwd, backend, work_dir=None, log_path=None, stop_argv=None):
+        
+        self.argv = argv
+        self.cwd = cwd
+        self.backend = backend
+        self.work_dir = work_dir
+        self.log_path = log_path
+        self.stop_argv = stop_argv
+        self.parser = LogParser()
+        self.start_time = time.time()
+        
+    def stop(self, process):
+        '''
+        stops the pdfLaTeX run of the job, also from another thread. The stop_argv goes first, so the 
+        process only ends when pdfLaTeX does and the work_dir is not removed while pdfLaTeX still writes.
+        
+        params process -> the started subprocess.Popen of argv
+        '''
+        
+        if process.poll() is None:
+            
+            self.run_stop_argv()
+            
+        process.kill()
+        
+    def run_stop_argv(self):
+        '''
+        runs the stop_argv of the job, if there is one, and waits until it is done
+        '''
+        
+        if self.stop_argv is not None:
+            
+            subprocess.run(self.stop_argv, stdin=subprocess.DEVNULL, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        
+    def result(self, returncode):
+        '''
+        cleans up and collects the outcome.
+        
+        params returncode -> exit code of pdfLaTeX, None when the run was stopped by its timeout
+        
+        returns CompileResult of the job
+        '''
+        
+        end_time = time.time()
+        log_time = None
+        
+        if self.log_path is not None and not self.parser.complete and os.path.exists(self.log_path):
+            
+            self.parser = LogParser()
+            
+            with open(self.log_path, 'r', errors='replace') as f:
+                
+                for line in f:
+                    
+                    if self.parser.feed(line):
+                        
+                        break
+                    
+            log_time = time.time() - end_time
+            
+        if self.work_dir is not None:
+            
+            shutil.rmtree(self.work_dir, ignore_errors=True)
+            
+        return CompileResult(self.parser.error_message, returncode, end_time - self.start_time, self.backend, log_time)
+
+
+def loop_reaps_children():
+    '''
+    checks whether the running event loop can wait for its own child processes, i. e. whether asyncio 
+    subprocesses can be used. On Python 3.7 the child watcher of asyncio is only attached to the loop of 
+    the main thread, the loop of a background thread would wait forever. On Windows only the proactor 
+    loop supports subprocesses.
+    
+    returns boolean -> True when asyncio.create_subprocess_exec() can be used within the running loop
+    '''
+    
+    loop = asyncio.get_event_loop()
+    
+    if sys.platform == 'win32':
+        
+        return isinstance(loop, getattr(asyncio, 'ProactorEventLoop', ()))
+    
+    if sys.version_info >= (3, 8):
+        # the default child watcher works for the loops of all threads
+        
+        return True
+    
+    try:
+        
+        watcher = asyncio.get_child_watcher()
+        
+    except (NotImplementedError, RuntimeError):
+        
+        return False
+    
+    return getattr(watcher, '_loop', None) is loop
+
+
+def kill_process(process):
+    '''
+    kills an asyncio subprocess which is still running. process.kill() is not used as it may reap the 
+    process itself before the child watcher of asyncio does.
+    
+    params process -> asyncio.subprocess.Process
+    '''
+    
+    if process.returncode is None:
+        
+        try:
+            
+            os.kill(process.pid, signal.SIGKILL)
+            
+        except ProcessLookupError:
+            # the process has ended in the meantime
+            
+            pass
+
+
+class CompilerBackend:
+    '''
+    interface of the compiler backends. A backend compiles a whole LaTeX string with pdfLaTeX and returns 
+    a CompileResult. start() and stop() enclose one reduction session such that expensive set-ups, e. g. 
+    a Docker container, are only done once. A backend only has to prepare() its CompileJob, the process 
+    is run by compile() or, within an event loop, by compile_async() as asyncio subprocess.
+    
+    With precompile_preamble every preamble which is compiled a second time within the session is dumped 
+    once into its own format file (mylatexformat). Every later document with exactly the same preamble, 
+    e. g. all candidates of ddmin() on the body, is compiled with that format such that the packages are 
+    not loaded again. So in batch mode every file gets the format of its own preamble. Preambles which are 
+    only compiled once, e. g. most candidates while the preamble itself is reduced, and all documents of 
+    a preamble whose dump fails are compiled normally.
+    
+    With halt_on_error pdfLaTeX stops at the first error, which is the only one latex_failure_check() 
+    looks at, and writes no .pdf file (draft mode). The log up to the first error stays the same.
+    
+    Every session gets its own unique workspace folder within work_dir which is removed by stop(). So 
+    sessions running at the same time, also in several processes, never share a file.
+    
+    params:
+    timeout -> seconds after which a pdfLaTeX run is stopped, None for no limit
+    precompile_preamble -> boolean, True to compile against a precompiled format of the preamble
+    halt_on_error -> boolean, True to stop pdfLaTeX at the first error without creating the .pdf file
+    work_dir -> folder in which the workspace of a session is created, e. g. tmpfs_folder(), None for the 
+                default of tempfile
+    '''
+    
+    name = 'base'
+    timeout = None
+    precompile_preamble = False
+    halt_on_error = False
+    work_dir = None
+    workspace = None # folder of the current session
+    job_counter = itertools.count() # shared by all backends, tests running at the same time never share a name
+    
+    def __init__(self, timeout=None, precompile_preamble=False, halt_on_error=False, work_dir=None):
+        
+        self.timeout = timeout
+        self.precompile_preamble = precompile_preamble
+        self.halt_on_error = halt_on_error
+        self.work_dir = work_dir
+        self.format_lock = threading.Lock()
+        self.formats = {} # hash of a preamble -> name of its format file, None when the dump failed
+        self.preamble_uses = {} # hash of a preamble -> number of compiled documents with it
+    
+    def start(self):
+        
+        self.formats = {}
+        self.preamble_uses = {}
+        
+        # the workspace of an earlier session which was not stopped is removed:
+        CompilerBackend.stop(self)
+        
+        if self.work_dir is not None:
+            
+            os.makedirs(self.work_dir, exist_ok=True)
+        
+        self.workspace = tempfile.mkdtemp(prefix=f'ddmin_{self.name}_', dir=self.work_dir)
+    
+    def stop(self):
+        
+        if self.workspace is not None:
+            
+            shutil.rmtree(self.workspace, ignore_errors=True)
+            self.workspace = None
+    
+    def version(self):
+        '''
+        returns string which identifies the TeX installation of the backend, it is part of the cache key
+        '''
+        
+        return self.name
+    
+    def mode(self):
+        '''
+        returns string which is added to the version, the results of the halt_on_error mode are cached 
+        separately as the draft mode could change errors which only occur while the .pdf file is written
+        '''
+        
+        return ':halt' if self.halt_on_error else ''
+    
+    def compile_options(self, format_name=None, interaction='nonstopmode'):
+        '''
+        returns list of the pdfLaTeX options of a candidate run, interaction 'batchmode' for a run which 
+        only writes the .log file
+        '''
+        
+        options = [f'-interaction={interaction}']
+        
+        if format_name is not None:
+            
+            options.insert(0, f'-fmt={format_name}')
+            
+        if self.halt_on_error:
+            
+            options += ['-halt-on-error', '-draftmode']
+            
+        return options
+    
+    def prepare(self, latex_string, job_name='candidate'):
+        '''
+        params:
+        latex_string -> string which contains the whole code to convert by pdfLaTeX
+        job_name -> name of the test, the start of the names of the .tex file and the outcome files
+        
+        returns CompileJob which runs pdfLaTeX on the written .tex file
+        '''
+        
+        raise NotImplementedError
+        
+    def job_file_name(self, job_name):
+        '''
+        returns a short unique name for the files of a test. The name of the test, e. g. the concatenated 
+        delta ids of ddmin(), can be longer than the file system allows, so only its start is kept.
+        '''
+        
+        return f'{re.sub(r"[^A-Za-z0-9]", "", job_name)[:20]}_{next(self.job_counter)}'
+        
+    def dump_format(self, latex_string, format_name):
+        '''
+        dumps the preamble of latex_string into the format file format_name.fmt.
+        
+        returns boolean -> True when the format was dumped without an error
+        '''
+        
+        return False
+    
+    def preamble_format(self, latex_string):
+        '''
+        returns the name of the precompiled format which fits to the preamble of latex_string, None when 
+        the document has to be compiled normally
+        '''
+        
+        if not self.precompile_preamble:
+            
+            return None
+        
+        begin_index = latex_string.find('\\begin{document}')
+        
+        if begin_index == -1:
+            
+            return None
+        
+        preamble_hash = hashlib.sha256(latex_string[:begin_index].encode('utf-8')).hexdigest()
+        
+        with self.format_lock:
+            
+            if preamble_hash not in self.formats:
+                
+                self.preamble_uses[preamble_hash] = self.preamble_uses.get(preamble_hash, 0) + 1
+                
+                if self.preamble_uses[preamble_hash] < 2:
+                    # a dump only pays off for a preamble which is compiled again
+                    
+                    return None
+                
+                del self.preamble_uses[preamble_hash]
+                format_name = 'preamble_' + preamble_hash[:12]
+                self.formats[preamble_hash] = format_name if self.dump_format(latex_string, format_name) else None
+                
+            return self.formats[preamble_hash]
+        
+    def format_dump_ok(self, returncode, log_file_path):
+        '''
+        checks the outcome of the format dump: pdfLaTeX has to finish without any error message
+        '''
+        
+        if returncode != 0 or not os.path.exists(log_file_path):
+            
+            return False
+        
+        with open(log_file_path, 'r', errors='replace') as f:
+            
+            return latex_failure_check(f.read()) == ''
+    
+    def compile(self, latex_string, job_name='candidate', timeout=None, on_start=None):
+        '''
+        params:
+        latex_string -> string which contains the whole code to convert by pdfLaTeX
+        job_name -> name of the test, the start of the names of the .tex file and the outcome files
+        timeout -> seconds after which the run is stopped, None for the timeout of the backend
+        on_start -> function which gets a function without parameters that stops the started run, e. g. to 
+                    stop it from another thread, None for nothing
+        
+        returns CompileResult of the run
+        '''
+        
+        job = self.prepare(latex_string, job_name)
+        timeout = timeout or self.timeout
+        timed_out = threading.Event()
+        
+        process = subprocess.Popen(job.argv, cwd=job.cwd, stdin=subprocess.DEVNULL, stdout=PIPE, 
+                                   stderr=subprocess.DEVNULL, text=True, errors='replace')
+        
+        if on_start is not None:
+            
+            on_start(lambda: job.stop(process))
+        
+        def stop_process():
+            
+            timed_out.set()
+            job.stop(process)
+        
+        # reading the output blocks, therefore the timeout kills the process from another thread:
+        timer = threading.Timer(timeout, stop_process) if timeout else None
+        
+        if timer is not None:
+            
+            timer.start()
+        
+        try:
+            
+            for line in process.stdout:
+                
+                if job.parser.feed(line):
+                    # the rest of the run is not needed anymore
+                    
+                    job.stop(process)
+                    break
+                    
+        finally:
+            
+            if timer is not None:
+                
+                timer.cancel()
+                
+            process.stdout.close()
+            returncode = process.wait()
+            
+        return job.result(None if timed_out.is_set() else returncode)
+    
+    async def compile_async(self, latex_string, job_name='candidate', timeout=None):
+        '''
+        like compile() but awaited within the running event loop. Where the loop can wait for child 
+        processes, pdfLaTeX is run as asyncio subprocess and no thread is occupied during the run. Otherwise, 
+        e. g. for the loop of a background thread on Python 3.7, the whole run is done by a thread of the 
+        default executor of the loop. When the task is cancelled, the run is stopped.
+        '''
+        
+        if loop_reaps_children():
+            
+            return await self.compile_subprocess(latex_string, job_name, timeout)
+        
+        return await self.compile_threaded(latex_string, job_name, timeout)
+    
+    async def compile_subprocess(self, latex_string, job_name='candidate', timeout=None):
+        '''
+        compile_async() with an asyncio subprocess. Only prepare(), which may dump the preamble format, and 
+        the clean-up of the job are done by the default executor of the loop as they block on files.
+        '''
+        
+        loop = asyncio.get_event_loop()
+        job = await loop.run_in_executor(None, self.prepare, latex_string, job_name)
+        
+        process = await asyncio.create_subprocess_exec(*job.argv, cwd=job.cwd, stdin=subprocess.DEVNULL, 
+                                                       stdout=PIPE, stderr=subprocess.DEVNULL)
+        
+        async def stop_process():
+            
+            if process.returncode is None and job.stop_argv is not None:
+                # stopping pdfLaTeX within a Docker container is a process itself:
+                
+                await loop.run_in_executor(None, job.run_stop_argv)
+                
+            kill_process(process)
+        
+        async def read_output():
+            
+            async for line in process.stdout:
+                
+                if job.parser.feed(line.decode('utf-8', errors='replace')):
+                    # the rest of the run is not needed anymore
+                    
+                    await stop_process()
+                    break
+                    
+            return await process.wait()
+        
+        try:
+            
+            returncode = await asyncio.wait_for(read_output(), timeout or self.timeout)
+            
+        except asyncio.TimeoutError:
+            
+            await stop_process()
+            await process.wait()
+            returncode = None
+            
+        except asyncio.CancelledError:
+            
+            # wait until the killed run is cleaned up, its cut-off output is not used:
+            await stop_process()
+            await process.wait()
+            await loop.run_in_executor(None, job.result, None)
+            
+            raise
+        
+        return await loop.run_in_executor(None, job.result, returncode)
+    
+    async def compile_threaded(self, latex_string, job_name='candidate', timeout=None):
+        '''
+        compile_async() for loops which can not wait for child processes. The whole run, including 
+        prepare() and a dump of the preamble format, is done by compile() in a thread of the default 
+        executor of the loop, so the loop is never blocked and no child watcher of asyncio is needed.
+        '''
+        
+        loop = asyncio.get_event_loop()
+        lock = threading.Lock()
+        cancelled = threading.Event()
+        stops = []
+        
+        def on_start(stop):
+            
+            with lock:
+                
+                stops.append(stop)
+                
+                if cancelled.is_set():
+                    # the task was cancelled before pdfLaTeX was started
+                    
+                    stop()
+        
+        compiling = loop.run_in_executor(None, self.compile, latex_string, job_name, timeout, on_start)
+        
+        try:
+            
+            return await asyncio.shield(compiling)
+        
+        except asyncio.CancelledError:
+            
+            with lock:
+                
+                cancelled.set()
+                started = list(stops)
+            
+            # stopping pdfLaTeX within a Docker container is a process itself:
+            for stop in started:
+                
+                await loop.run_in_executor(None, stop)
+            
+            # wait until the killed run is cleaned up, its cut-off output is not used:
+            await asyncio.wait([compiling])
+            
+            raise
+        
+        
+class LocalBackend(CompilerBackend):
+    '''
+    runs pdfLaTeX of the host directly as subprocess. Every test gets its own temporary directory within 
+    the workspace of the session which is removed afterwards.
+    
+    params:
+    pdflatex -> name or path of the pdfLaTeX executable
+    timeout -> seconds after which a pdfLaTeX run is stopped, None for no limit
+    precompile_preamble -> boolean, True to compile against a precompiled format of the preamble
+    halt_on_error -> boolean, True to stop pdfLaTeX at the first error without creating the .pdf file
+    work_dir -> folder in which the workspace of a session is created, None for the default of tempfile
+    '''
+    
+    name = 'local'
+    
+    def __init__(self, pdflatex='pdflatex', timeout=None, precompile_preamble=False, halt_on_error=False, work_dir=None):
+        
+        super().__init__(timeout, precompile_preamble, halt_on_error, work_dir)
+        self.pdflatex = pdflatex
+        self.version_string = None
+            
+    def dump_format(self, latex_string, format_name):
+        
+        with open(os.path.join(self.workspace, format_name + '.tex'), 'w') as g:
+            g.write(latex_string)
+            
+        try:
+            
+            returncode = subprocess.run([self.pdflatex, '-ini', '-interaction=nonstopmode', f'-jobname={format_name}', 
+                                         '&pdflatex', 'mylatexformat.ltx', format_name + '.tex'], 
+                                        cwd=self.workspace, stdin=subprocess.DEVNULL, stdout=PIPE, stderr=PIPE, 
+                                        timeout=self.timeout).returncode
+            
+        except subprocess.TimeoutExpired:
+            
+            return False
+        
+        return self.format_dump_ok(returncode, os.path.join(self.workspace, format_name + '.log'))
+        
+    def version(self):
+        
+        if self.version_string is None:
+            # first line of the version output, e. g. 'pdfTeX 3.141592653-2.6-1.40.25 (TeX Live 2023/Debian)'
+            
+            version_output = subprocess.run([self.pdflatex, '--version'], stdout=PIPE, stderr=PIPE, text=True).stdout
+            self.version_string = self.name + ':' + version_output.split('\n')[0] + ':' + self.installation_fingerprint()
+            
+        return self.version_string + self.mode()
+    
+    def installation_fingerprint(self):
+        '''
+        the version line stays the same when packages of the installation are updated or installed, e. g. 
+        by tlmgr or the package manager. Both rewrite the package database texlive.tlpdb or the file name 
+        databases ls-R of the texmf trees, so their modification times and sizes are hashed.
+        
+        returns string -> short hash of the package databases of the TeX installation, it is empty when 
+                          kpsewhich is not found
+        '''
+        
+        # kpsewhich of the same installation as the pdfLaTeX executable:
+        kpsewhich = os.path.join(os.path.dirname(self.pdflatex), 'kpsewhich')
+        stamps = []
+        
+        for variable, database in [('TEXMFROOT', os.path.join('tlpkg', 'texlive.tlpdb')), ('TEXMFDIST', 'ls-R'), 
+                                   ('TEXMFLOCAL', 'ls-R'), ('TEXMFSYSVAR', 'ls-R')]:
+            
+            try:
+                
+                folder = subprocess.run([kpsewhich, '-var-value', variable], stdout=PIPE, stderr=PIPE, text=True).stdout.strip()
+                
+            except OSError:
+                
+                return ''
+            
+            path = os.path.join(folder, database)
+            
+            if folder != '' and os.path.exists(path):
+                
+                info = os.stat(path)
+                stamps.append(f'{path}:{info.st_mtime_ns}:{info.st_size}')
+                
+        return hashlib.sha256('\n'.join(stamps).encode('utf-8')).hexdigest()[:12]
+        
+    def prepare(self, latex_string, job_name='candidate'):
+        
+        format_name = self.preamble_format(latex_string)
+        job_name = self.job_file_name(job_name)
+        
+        # without a started session the directory is created within the work_dir:
+        work_dir = tempfile.mkdtemp(prefix='ddmin_', dir=self.workspace or self.work_dir)
+        
+        with open(os.path.join(work_dir, job_name + '.tex'), 'w') as g:
+            g.write(latex_string)
+            
+        argv = [self.pdflatex] + self.compile_options(format_name) + [job_name + '.tex']
+        
+        if format_name is not None:
+            # pdfLaTeX looks for the format file also in the working directory:
+            
+            os.symlink(os.path.join(self.workspace, format_name + '.fmt'), os.path.join(work_dir, format_name + '.fmt'))
+                
+        return CompileJob(argv, work_dir, self.name, work_dir=work_dir)
+    
+    
+class DockerBackend(CompilerBackend):
+    '''
+    runs pdfLaTeX within one long-lived Docker container per session. The TeX image is pinned and reused:
+    when it is not present yet it is loaded from the image_tarball (see save_image()) or built once from 
+    a pinned base image. Its image id is recorded when the session starts, the container runs exactly 
+    this image and the id is part of the cache key. No further image is built during a session. 
+    The workspace of the session on the host, by default within the tmpfs in memory (/dev/shm), is 
+    bind-mounted into the container. So, the candidate .tex files are handed in and the .log files are 
+    read back through the mount without any copy and without touching the disk. With log_from_mount 
+    pdfLaTeX runs in batch mode and the error message is read from the .log file, else it is read from
+    the output of 'docker exec'. Every test gets its own folder within the workspace which is removed 
+    afterwards, every container gets a unique name. A test which is stopped, e. g. by its timeout or when 
+    it is cancelled in the parallel mode, also kills its pdfLaTeX process within the container.
+    
+    Docker file: file which contains instructions about installations and processes
+    Image: compiled Docker file. 
+    Container: instance of an image, is the virtual operating system.
+    
+    params:
+    project_folder -> the folder on the host in which the workspace of a session is created, None for the 
+                      tmpfs_folder() or, without tmpfs, 'project_folder'
+    problem_id -> defines the storage location of the pdfLaTeX outcome files within the workspace
+    image -> tag of the TeX image
+    base_image -> pinned image the TeX image is built from
+    image_tarball -> file of 'docker save' which is loaded when the image is not present, None for none
+    pinned_image_id -> expected image id ('docker image inspect' .Id, e. g. 'sha256:...'), None to accept 
+                       the present image. It is no repository digest, which locally built images do not have
+    timeout -> seconds after which a pdfLaTeX run is stopped, None for no limit
+    precompile_preamble -> boolean, True to compile against a precompiled format of the preamble, this 
+                           needs the mylatexformat package (texlive-latex-extra) within the image
+    halt_on_error -> boolean, True to stop pdfLaTeX at the first error without creating the .pdf file
+    log_from_mount -> boolean, True to read the error message from the .log file in the workspace
+    '''
+    
+    name = 'docker'
+    container_folder = '/home/project_folder' # mount point of the workspace within the container
+    
+    def __init__(self, project_folder=None, problem_id=0, image='latex_worker_image:ubuntu22.04', 
+                 base_image='ubuntu:22.04', image_tarball=None, pinned_image_id=None, timeout=None, 
+                 precompile_preamble=False, halt_on_error=False, log_from_mount=True):
+        
+        if project_folder is None:
+            
+            project_folder = tmpfs_folder() or 'project_folder'
+        
+        super().__init__(timeout, precompile_preamble, halt_on_error, work_dir=os.path.abspath(project_folder))
+        self.log_from_mount = log_from_mount
+        self.problem_folder = f'{str(problem_id)}{str(problem_id)}'
+        self.image = image
+        self.base_image = base_image
+        self.image_tarball = image_tarball
+        self.pinned_image_id = pinned_image_id
+        self.image_id = None # recorded id of the image of the session
+        self.container_name = None
+        
+    def start(self):
+        
+        # remove the container of an earlier session which was not stopped:
+        self.stop()
+        
+        # create the unique workspace of the session:
+        super().start()
+        
+        os.makedirs(f'{self.workspace}/{self.problem_folder}', exist_ok=True)
+        
+        self.image_id = self.ensure_image()
+
+        # the uuid keeps the names unique also for sessions started within the same second:
+        container_name = f'latex_container_{uuid.uuid4().hex}' 
+
+        # keep the container alive such that every test is only one 'docker exec' of pdfLaTeX:
+        subprocess.run(['docker', 'run', '-d', '--name', container_name, 
+                        '-v', f'{self.workspace}:{self.container_folder}', 
+                        self.image_id, 'sleep', 'infinity'])
+
+        self.container_name = container_name
+        
+    def inspect_image(self):
+        '''
+        returns the id of the image, None when it is not present
+        '''
+        
+        inspection = subprocess.run(['docker', 'image', 'inspect', '--format', '{{.Id}}', self.image], 
+                                    stdout=PIPE, stderr=PIPE, text=True)
+        
+        return inspection.stdout.strip() if inspection.returncode == 0 else None
+        
+    def build_image(self):
+        
+        build_folder = tempfile.mkdtemp(prefix='ddmin_image_', dir=self.work_dir)
+        
+        try:
+            
+            # Docker File of the worker image, no candidate is baked into it:
+            with open(f'{build_folder}/Dockerfile', 'w') as f:
+
+                f.write(f'FROM {self.base_image} \n\n')
+                f.write('RUN apt-get update && apt-get install -y --no-install-recommends texlive texlive-latex-extra ' 
+                        '&& rm -rf /var/lib/apt/lists/* \n')
+                # the texlive package also contains pdfLaTeX, texlive-latex-extra the mylatexformat package
+
+                f.write(f'WORKDIR {self.container_folder} \n') # set working directory
+
+            subprocess.run(['docker', 'build', '-t', self.image, build_folder], check=True)
+            
+        finally:
+            
+            shutil.rmtree(build_folder, ignore_errors=True)
+        
+    def ensure_image(self):
+        '''
+        makes the TeX image available, only when it is not present it is loaded or built.
+        
+        returns the id of the image
+        '''
+        
+        image_id = self.inspect_image()
+        
+        if image_id is None and self.image_tarball is not None and os.path.exists(self.image_tarball):
+            
+            subprocess.run(['docker', 'load', '-i', self.image_tarball], stdout=PIPE, check=True)
+            image_id = self.inspect_image()
+            
+        if image_id is None:
+            
+            self.build_image()
+            image_id = self.inspect_image()
+            
+        if image_id is None:
+            
+            raise RuntimeError(f'The TeX image {self.image} could not be loaded or built')
+            
+        if self.pinned_image_id is not None and image_id != self.pinned_image_id:
+            
+            raise RuntimeError(f'The TeX image {self.image} has the image id {image_id} instead of {self.pinned_image_id}')
+            
+        return image_id
+    
+    def save_image(self, path):
+        '''
+        writes the TeX image to a tarball which later sessions, e. g. on other hosts, load as image_tarball
+        '''
+        
+        self.ensure_image()
+        subprocess.run(['docker', 'save', '-o', path, self.image], check=True)
+        
+    def version(self):
+        
+        # the recorded image id of the session, it changes with every rebuild of the TeX image:
+        if self.image_id is None:
+            
+            self.image_id = self.ensure_image()
+        
+        return self.name + ':' + self.image_id + self.mode() + (':log' if self.log_from_mount else '')
+        
+    def stop(self):
+        
+        # removes the long-lived container of the current session when there is one:
+        if self.container_name is not None:
+
+            subprocess.run(['docker', 'rm', '--force', self.container_name], stdout=PIPE, stderr=PIPE)
+            self.container_name = None
+        
+        # and afterwards its workspace:
+        super().stop()
+            
+    def dump_format(self, latex_string, format_name):
+        
+        # the format file is written to the working directory where pdfLaTeX also looks for it:
+        with open(f'{self.workspace}/{format_name}.tex', 'w') as g:
+            g.write(latex_string)
+            
+        timeout_prefix = ['timeout', '--signal=KILL', str(self.timeout)] if self.timeout else []
+            
+        returncode = subprocess.run(['docker', 'exec', '-w', self.container_folder, self.container_name] + timeout_prefix + [
+                                     'pdflatex', '-ini', '-interaction=nonstopmode', f'-jobname={format_name}', 
+                                     '&pdflatex', 'mylatexformat.ltx', f'{format_name}.tex'], 
+                                    stdin=subprocess.DEVNULL, stdout=PIPE, stderr=PIPE).returncode
+        
+        return self.format_dump_ok(returncode, f'{self.workspace}/{format_name}.log')
+            
+    def prepare(self, latex_string, job_name='candidate'):
+        
+        if self.container_name is None:
+            
+            self.start()
+            
+        format_name = self.preamble_format(latex_string)
+        job_name = self.job_file_name(job_name)
+        job_folder = f'{self.problem_folder}/{job_name}'
+        os.makedirs(f'{self.workspace}/{job_folder}')
+        
+        # the .tex file is directly visible within the container through the mount:
+        with open(f'{self.workspace}/{job_folder}/{job_name}.tex', 'w') as g:
+            g.write(latex_string)
+            
+        # killing the 'docker exec' client, e. g. after the first error was read, by the timeout or when a test 
+        # is cancelled, does not stop the process within the container. Therefore the shell records the pid 
+        # of pdfLaTeX (exec keeps it) and the stop command kills it. A stop which comes before the start is 
+        # noted in the file 'stop' such that pdfLaTeX is not started at all:
+        start_script = f'echo $$ > ./{job_folder}/pid; [ -e ./{job_folder}/stop ] && exit 137; exec "$@"'
+        stop_script = f'touch ./{job_folder}/stop; kill -KILL $(cat ./{job_folder}/pid 2>/dev/null) 2>/dev/null; true'
+
+        # create the .pdf file, pdfLaTeX writes the .log file next to it:
+        interaction = 'batchmode' if self.log_from_mount else 'nonstopmode'
+        argv = ['docker', 'exec', '-w', self.container_folder, self.container_name, 'sh', '-c', start_script, 'sh', 
+                'pdflatex'] + self.compile_options(format_name, interaction) + ['-output-directory', f'./{job_folder}', 
+                f'./{job_folder}/{job_name}.tex']
+        stop_argv = ['docker', 'exec', '-w', self.container_folder, self.container_name, 'sh', '-c', stop_script]
+        
+        # the .log file is read through the mount before the folder of the test is removed:
+        log_path = f'{self.workspace}/{job_folder}/{job_name}.log' if self.log_from_mount else None
+
+        return CompileJob(argv, None, self.name, work_dir=f'{self.workspace}/{job_folder}', log_path=log_path, 
+                          stop_argv=stop_argv)
+    
+    
+def tmpfs_folder():
+    '''
+    returns the folder of the tmpfs in memory (/dev/shm) when the host has one, else None
+    '''
+    
+    if os.path.isdir('/dev/shm') and os.access('/dev/shm', os.W_OK):
+        
+        return '/dev/shm'
+    
+    return None
+    
+    
+def default_backend(precompile_preamble=False, halt_on_error=False, work_dir=None, tmpfs=False):
+    '''
+    returns LocalBackend when pdfLaTeX is installed on the host, else the DockerBackend. The work_dir is 
+    the folder in which the workspaces of the sessions are created, None for the default. With tmpfs the 
+    workspaces are created in memory when no work_dir is given.
+    '''
+    
+    if work_dir is None and tmpfs:
+        
+        work_dir = tmpfs_folder()
+    
+    if shutil.which('pdflatex') is not None:
+        
+        return LocalBackend(precompile_preamble=precompile_preamble, halt_on_error=halt_on_error, work_dir=work_dir)
+    
+    # the DockerBackend uses the tmpfs by default:
+    return DockerBackend(project_folder=work_dir, precompile_preamble=precompile_preamble, halt_on_error=halt_on_error)
+
+
+class OracleCache:
+    '''
+    cache of the found error messages. The key is a hash of the whole LaTeX string which was compiled and 
+    of the backend version. So, identical strings coming from different deltas or different steps of 
+    ddmin_loop() are only compiled once. In memory the least recently used entries are dropped when more 
+    than maxsize entries are stored. 
+    When a path is given, every entry is also written to an SQLite file. Through that later runs, e. g. on 
+    the same or a slightly edited .tex file, and reductions running at the same time in other processes
+    reuse the earlier outcomes.
+    
+    params:
+    maxsize -> maximal number of error messages stored in memory
+    path -> SQLite file of the persistent cache, None for a cache in memory only
+    '''
+    
+    def __init__(self, maxsize=4096, path=None):
+        
+        self.maxsize = maxsize
+        self.path = path
+        self.entries = OrderedDict()
+        self.lock = threading.Lock() # the cache is also used from the thread of the compile_pool
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        
+        if self.path is not None:
+            
+            # the schema is created once, the journal mode is stored in the file:
+            with contextlib.closing(self.connect()) as connection, connection:
+                
+                connection.execute('PRAGMA journal_mode=WAL')
+                connection.execute('CREATE TABLE IF NOT EXISTS error_blocks (key TEXT PRIMARY KEY, backend_version TEXT, error_message TEXT, created REAL)')
+        
+    def connect(self):
+        
+        # one short connection per access such that several processes can share the file, 
+        # the caller closes it:
+        return sqlite3.connect(self.path, timeout=30)
+        
+    def key(self, backend_version, latex_string):
+        
+        return hashlib.sha256((backend_version + '\0' + latex_string).encode('utf-8')).hexdigest()
+        
+    def get(self, key):
+        
+        with self.lock:
+            
+            if key in self.entries:
+
+                self.entries.move_to_end(key)
+                self.hits += 1
+
+                return self.entries[key]
+        
+        if self.path is not None:
+            
+            with contextlib.closing(self.connect()) as connection:
+                
+                row = connection.execute('SELECT error_message FROM error_blocks WHERE key = ?', (key,)).fetchone()
+                
+            if row is not None:
+                
+                with self.lock:
+                    
+                    self.disk_hits += 1
+                    
+                self.remember(key, row[0])
+                
+                return row[0]
+        
+        with self.lock:
+            
+            self.misses += 1
+        
+        return None
+    
+    def remember(self, key, error_message):
+        
+        with self.lock:
+            
+            self.entries[key] = error_message
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.maxsize:
+
+                self.entries.popitem(last=False)
+    
+    def put(self, key, error_message, backend_version=''):
+        
+        self.remember(key, error_message)
+        
+        if self.path is not None:
+            
+            with contextlib.closing(self.connect()) as connection, connection:
+                
+                connection.execute('INSERT OR REPLACE INTO error_blocks VALUES (?, ?, ?, ?)', (key, backend_version, error_message, time.time()))
+
+
+class TestContext:
+    '''
+    the state of the reduction which issues a test, taken from the reduction_state of the current thread.
+    The compile_pool gets it handed in as its thread does not see the reduction_state of that thread.
+    
+    attributes:
+    stats -> ReductionStats of the reduction, None for no counting
+    phase -> phase of the reduction which runs the test
+    target -> the targeted error message, None while it is not known yet
+    file_name -> the reduced .tex file, None when it is not known
+    delta_ids -> list of the delta ids of the tested candidate, None when the test has none, e. g. for the
+                 original .tex file
+    '''
+    
+    def __init__(self, delta_ids=None):
+        
+        self.stats = getattr(reduction_state, 'stats', None)
+        self.phase = getattr(reduction_state, 'phase', None)
+        self.target = getattr(reduction_state, 'error_message', None)
+        self.file_name = getattr(reduction_state, 'file_name', None)
+        # copied, as e. g. the cumulative nest probes extend their list afterwards:
+        self.delta_ids = list(delta_ids) if delta_ids is not None else None
+        
+        
+def oracle_lookup(session, curr_latex_string, context):
+    '''
+    looks up the LaTeX string in the oracle_cache of the session.
+    
+    params:
+    session -> the ReductionSession which runs the test
+    curr_latex_string -> string which contains the whole code to convert by pdfLaTeX
+    context -> TestContext of the test, its ReductionStats count the cache hit
+    
+    returns:
+    cache_key -> key of the string in the oracle_cache
+    error_message -> the cached error message, None when the string was not compiled yet
+    '''
+    
+    if session.backend_version is None:
+        
+        session.backend_version = session.backend.version()
+    
+    cache_key = session.oracle_cache.key(session.backend_version, curr_latex_string)
+    error_message = session.oracle_cache.get(cache_key)
+    
+    if error_message is not None and context.stats is not None:
+        
+        context.stats.count(compiled=False, phase=context.phase)
+        
+    return cache_key, error_message
+
+
+def oracle_store(session, cache_key, result, context):
+    '''
+    takes the error message of a compile and stores it in the oracle_cache of the session. The outcome of 
+    a run which was stopped by its timeout before any error is not stored as its output may be incomplete.
+    
+    params:
+    session -> the ReductionSession which runs the test
+    cache_key -> key of oracle_lookup()
+    result -> CompileResult of the compile
+    context -> TestContext of the test, its ReductionStats sum the compile time and the log retrieval
+    
+    returns error_message -> found error message as string, None when pdfLaTeX produced no output
+    '''
+    
+    if context.stats is not None:
+        
+        context.stats.add_time('compile', result.duration)
+        
+        if result.log_time is not None:
+            
+            context.stats.add_time('log retrieval', result.log_time)
+    
+    error_message = result.error_message
+    
+    if error_message is None:
+        
+        return None
+    
+    # the first error message is complete even when the run was stopped afterwards:
+    if result.returncode is not None or error_message != '':
+        
+        session.oracle_cache.put(cache_key, error_message, session.backend_version)
+    
+    return error_message
+
+
+def latex_error_search(curr_delta, curr_latex_string, delta_ids=None):
+    '''
+    compiles the LaTeX string with the compiler backend of the current_session() and extracts the error message.
+    Strings which were already compiled by the same backend version are taken from the oracle_cache.
+    
+    params:
+    curr_delta -> the active delta enumeration. It is taken to formulate a name for the compiled file
+    curr_latex_string -> string which contains the whole code to convert by pdfLaTeX
+    delta_ids -> list of the delta ids of the candidate for the SearchTrace, None for none
+    
+    returns error_message -> found error message as string, None when pdfLaTeX produced no output
+    '''
+    
+    session = current_session()
+    context = TestContext(delta_ids)
+    start_time = time.perf_counter()
+    cache_key, error_message = oracle_lookup(session, curr_latex_string, context)
+    
+    if error_message is not None:
+        
+        session.trace_test(context, curr_delta, curr_latex_string, error_message, start_time, cache_hit=True)
+        
+        return error_message
+    
+    if context.stats is not None:
+        
+        context.stats.count(compiled=True, phase=context.phase)
+    
+    result = session.backend.compile(curr_latex_string, job_name=curr_delta)
+    error_message = oracle_store(session, cache_key, result, context)
+    session.trace_test(context, curr_delta, curr_latex_string, error_message, start_time, cache_hit=False)
+    
+    return error_message
+
+
+class AsyncCompileScheduler:
+    '''
+    asyncio based oracle: compiles LaTeX strings with the compiler backend of a session as asyncio tasks 
+    and extracts their error messages. At most max_concurrency pdfLaTeX runs are active at the same time, 
+    every run is stopped after timeout seconds and a cancelled task kills its pdfLaTeX process. Everything 
+    which blocks, the oracle_cache and the trace, runs in the default executor of the loop. pdfLaTeX runs 
+    as asyncio subprocess, only where the loop can not wait for child processes the whole compile runs in 
+    the executor, see compile_async().
+    
+    Within an event loop use 'await scheduler.latex_error_search(...)'. The synchronous ddmin() uses 
+    start(), submit() and shutdown() instead which run the event loop in a background thread.
+    
+    params:
+    session -> the ReductionSession whose backend and oracle_cache are used
+    max_concurrency -> maximal number of pdfLaTeX runs at the same time
+    timeout -> seconds after which a pdfLaTeX run is stopped, None for the timeout of the backend
+    '''
+    
+    def __init__(self, session, max_concurrency=4, timeout=None):
+        
+        self.session = session
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.semaphore = None # created within the event loop which uses it
+        self.loop = None
+        self.thread = None
+        self.executor = None
+        self.futures = set() # futures of submit() which are not done yet
+        
+    async def latex_error_search(self, curr_delta, curr_latex_string, context=None):
+        '''
+        like latex_error_search() but the compile is awaited. The TestContext is handed in by submit() as 
+        the thread of the event loop does not see the reduction_state of the submitting thread.
+        '''
+        
+        context = context or TestContext()
+        
+        if self.semaphore is None:
+            
+            self.semaphore = asyncio.Semaphore(self.max_concurrency)
+            
+        loop = asyncio.get_event_loop()
+        start_time = time.perf_counter()
+        
+        # the SQLite file of the oracle_cache and the trace file block, they are used from the executor:
+        cache_key, error_message = await loop.run_in_executor(None, oracle_lookup, self.session, curr_latex_string, context)
+        
+        if error_message is not None:
+            
+            await loop.run_in_executor(None, self.session.trace_test, context, curr_delta, curr_latex_string, 
+                                       error_message, start_time, True)
+            
+            return error_message
+        
+        async with self.semaphore:
+            # also a compile which is cancelled later on is counted:
+            
+            if context.stats is not None:
+                
+                context.stats.count(compiled=True, phase=context.phase)
+            
+            start_time = time.perf_counter()
+            
+            try:
+                
+                result = await self.session.backend.compile_async(curr_latex_string, job_name=curr_delta, timeout=self.timeout)
+                
+            except asyncio.CancelledError:
+                # the counted compile also shows up in the trace:
+                
+                await loop.run_in_executor(None, self.session.trace_test, context, curr_delta, curr_latex_string, 
+                                           None, start_time, False, 'cancelled')
+                
+                raise
+            
+        error_message = await loop.run_in_executor(None, oracle_store, self.session, cache_key, result, context)
+        await loop.run_in_executor(None, self.session.trace_test, context, curr_delta, curr_latex_string, 
+                                   error_message, start_time, False)
+            
+        return error_message
+    
+    def start(self):
+        
+        self.loop = asyncio.new_event_loop()
+        # max_concurrency threads for the compiles and some more such that cache hits are not held up:
+        self.executor = ThreadPoolExecutor(max_workers=self.max_concurrency + 2)
+        self.loop.set_default_executor(self.executor)
+        self.thread = threading.Thread(target=self.loop.run_forever, daemon=True)
+        self.thread.start()
+        
+    def submit(self, curr_delta, curr_latex_string, delta_ids=None):
+        '''
+        returns concurrent.futures.Future of the error message, cancelling it cancels the asyncio task
+        '''
+        
+        future = asyncio.run_coroutine_threadsafe(self.latex_error_search(curr_delta, curr_latex_string, TestContext(delta_ids)), self.loop)
+        
+        self.futures.add(future)
+        future.add_done_callback(self.futures.discard)
+        
+        return future
+    
+    def shutdown(self):
+        
+        # kill the still running pdfLaTeX processes, their cut-off outputs are never cached. Cancelling
+        # an already cancelled future does nothing, so no task is interrupted within its clean-up:
+        for future in list(self.futures):
+            
+            future.cancel()
+        
+        async def wait_all():
+            # wait until the cancelled tasks are finished and the killed processes are reaped
+            
+            tasks = [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+            await asyncio.gather(*tasks, return_exceptions=True)
+            
+        asyncio.run_coroutine_threadsafe(wait_all(), self.loop).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join()
+        self.loop.close()
+        self.executor.shutdown()
+
+
+def oracle_prefetch(candidates):
+    '''
+    submits several LaTeX strings to the compile_pool of the current_session() such that they are compiled 
+    at the same time.
+    
+    params candidates -> list of tuples (curr_delta, curr_latex_string, delta_ids)
+    
+    returns prefetched -> dictionary which maps curr_delta to the future of its error message
+    '''
+    
+    compile_pool = current_session().compile_pool
+    prefetched = {}
+    
+    for curr_delta, curr_latex_string, delta_ids in candidates:
+        
+        prefetched[curr_delta] = compile_pool.submit(curr_delta, curr_latex_string, delta_ids)
+        
+    return prefetched
+
+
+def oracle_result(prefetched, curr_delta, curr_latex_string, delta_ids=None):
+    '''
+    returns the error message of a prefetched test or runs latex_error_search() when the test was not 
+    prefetched.
+    
+    params:
+    prefetched -> dictionary of oracle_prefetch()
+    curr_delta -> the active delta enumeration
+    curr_latex_string -> string which contains the whole code to convert by pdfLaTeX
+    delta_ids -> list of the delta ids of the candidate for the SearchTrace, None for none
+    '''
+    
+    if curr_delta in prefetched:
+        
+        return prefetched.pop(curr_delta).result()
+    
+    return latex_error_search(curr_delta=curr_delta, curr_latex_string=curr_latex_string, delta_ids=delta_ids)
+
+
+def oracle_cancel(prefetched):
+    '''
+    cancels the prefetched tests which are not needed any longer, their pdfLaTeX processes are killed.
+    
+    params prefetched -> dictionary of oracle_prefetch()
+    '''
+    
+    for future in prefetched.values():
+        
+        future.cancel()
+        
+    prefetched.clear()
+
+
+# In[33]:
+
+
+def nest_probes(front_skeleton, back_skeleton, command_ele_front, command_ele_back, center_content_delta, nested_commands_center, ind_command):
+    '''
+    yields the tests of the nest analysis in ddmin_loop() in the order of their priority:
+    a) every content delta of the nest without the shell
+    c) every content delta of the nest within the shell
+    d) the content deltas within the shell, each time one content element more
+    
+    params:
+    front_skeleton -> front skeleton in front of the nest
+    back_skeleton -> back skeleton after the nest
+    command_ele_front -> front part/shell of the nest
+    command_ele_back -> back part/shell of the nest
+    center_content_delta -> list containing the content of the nest
+    nested_commands_center -> list describing if elements of center_content_delta are nested
+    ind_command -> number of the nest, used for the name of the test
+    
+    yields:
+    curr_delta_inter -> name of the test
+    latex_string_inter -> whole LaTeX string to test
+    f -> the front shell used in the test
+    b -> the back shell used in the test
+    c -> the content delta added in the test
+    c_ids -> list of the content deltas in the test, given by their index in center_content_delta
+    '''
+    
+    c_list = []
+    
+    for pass_name, f, b in [('nestContentOnly', '', ''), ('nestContentInShell', command_ele_front, command_ele_back), ('nestContentCumulative', command_ele_front, command_ele_back)]:
+        
+        for c_ind, (d, c) in enumerate(zip(nested_commands_center, center_content_delta)):
+            
+            if pass_name == 'nestContentCumulative':
+                
+                c_list.append(c)
+                c_cur_list = c_list
+                c_ids = list(range(c_ind + 1))
+                
+            else:
+                
+                c_cur_list = [c]
+                c_ids = [c_ind]
+                
+            latex_string_inter = ''.join(front_skeleton + [f] + c_cur_list + [b] + back_skeleton) 
+            
+            yield f'{pass_name}{ind_command}_{c_ind}', latex_string_inter, f, b, c, c_ids
+            
+            
+# phases of the ReductionStats for the passes of nest_probes():
+nest_phases = {'nestContentOnly': 'nest content', 'nestContentInShell': 'nest content in shell', 'nestContentCumulative': 'nest content cumulative'}
+
+
+def nest_phase(curr_delta):
+    '''
+    returns the phase of a test of nest_probes() by its name, e. g. 'nestContentInShell0_3'
+    '''
+    
+    return nest_phases[re.match(r'[A-Za-z]+', curr_delta).group(0)]
+            
+            
+class SearchTrace:
+    '''
+    machine-readable trace of every tested candidate, e. g. to visualise the search or to compare the 
+    strategies. Every event holds the name of the test, the list of the delta ids of the tested candidate 
+    (the indices of the content deltas for the nest analysis, the [start, end] spans of the nodes for 
+    hierarchical_ddmin(), None for the original .tex file), the phase, the size of the candidate in characters, the backend, the duration, whether 
+    the outcome came from the oracle_cache, the signature of the found error and the decision:
+    
+    'original' -> the test of the inputted file which defines the targeted error
+    'fail' -> the targeted error appears, the candidate can replace the current one
+    'pass' -> no error at all
+    'unresolved' -> another error or no output of pdfLaTeX
+    'cancelled' -> the compile was stopped as the step was decided by another candidate, its outcome is 
+                   unknown. It is counted as a compile by the ReductionStats.
+    
+    params:
+    path -> file of the trace
+    trace_format -> 'jsonl' for one JSON object per line, written at once, or 'chrome' for the trace event 
+                    format of chrome://tracing and Perfetto, written by close()
+    '''
+    
+    def __init__(self, path, trace_format='jsonl'):
+        
+        if trace_format not in ('jsonl', 'chrome'):
+            
+            raise ValueError(f'Unknown trace format {trace_format!r}, use jsonl or chrome')
+        
+        self.path = path
+        self.trace_format = trace_format
+        self.lock = threading.Lock()
+        self.start_time = time.perf_counter()
+        self.events = [] # collected events of the chrome format
+        self.file = None
+        self.written = False # an earlier part of the trace is already in the file
+        
+    def decision(self, equivalence, context, error_message):
+        
+        if context.phase == 'original' or context.target is None:
+            
+            return 'original'
+        
+        if error_message and equivalence(ErrorSignature(error_message), ErrorSignature(context.target)):
+            
+            return 'fail'
+        
+        return 'pass' if error_message == '' else 'unresolved'
+        
+    def add(self, equivalence, backend, context, curr_delta, curr_latex_string, error_message, start_time, cache_hit, decision=None):
+        
+        signature = ErrorSignature(error_message) if error_message else None
+        event = {'test': curr_delta, 
+                 'delta_ids': context.delta_ids, 
+                 'file': context.file_name, 
+                 'phase': context.phase, 
+                 'size': len(curr_latex_string), 
+                 'backend': backend, 
+                 'start': start_time - self.start_time, 
+                 'duration': time.perf_counter() - start_time, 
+                 'cache_hit': cache_hit, 
+                 'error_class': signature.error_class if signature else None, 
+                 'control_sequence': signature.control_sequence if signature else None, 
+                 'decision': decision or self.decision(equivalence, context, error_message)}
+        
+        with self.lock:
+            
+            if self.trace_format == 'chrome':
+                # complete events in microseconds, one row per thread
+                
+                self.events.append({'name': curr_delta, 'cat': context.phase or 'other', 'ph': 'X', 
+                                    'ts': event['start'] * 1e6, 'dur': event['duration'] * 1e6, 
+                                    'pid': os.getpid(), 'tid': threading.get_ident(), 'args': event})
+                
+                return
+            
+            if self.file is None:
+                
+                self.file = open(self.path, 'a' if self.written else 'w')
+                self.written = True
+                
+            self.file.write(json.dumps(event) + '\n')
+            self.file.flush()
+            
+    def close(self):
+        
+        with self.lock:
+            
+            if self.trace_format == 'chrome':
+                
+                with open(self.path, 'w') as g:
+                    json.dump({'traceEvents': self.events}, g)
+                    
+            elif self.file is not None:
+                
+                self.file.close()
+                self.file = None
+        
+        
+class ReductionSession:
+    '''
+    one reduction session: holds the compiler backend, the oracle_cache, the compile_pool, the equivalence 
+    policy, the ddmin strategy, the counters and the working directory. The backend creates a unique 
+    workspace for the session when it is started and removes it when it is stopped. Nothing is shared through module 
+    globals, so several sessions can reduce at the same time within one process, e. g. in a long-lived 
+    service. The functions of ddmin find the session of their thread by current_session().
+    
+    with ReductionSession(workers=4) as session:
+        final_latex = session.reduce_file('tex_test_files/incorrect1.tex')
+    
+    params:
+    backend -> CompilerBackend which runs pdfLaTeX, when None the default_backend() is used
+    workers -> number of pdfLaTeX runs at the same time, 1 for the serial mode
+    precompile_preamble -> boolean, True to compile the body candidates against a precompiled format of 
+                           the preamble, only used for the default_backend()
+    halt_on_error -> boolean, True to stop every pdfLaTeX run at the first error without creating the 
+                     .pdf file, only used for the default_backend()
+    equivalence -> name of one of the equivalence_policies or a function comparing two ErrorSignature 
+                   objects, decides whether a found error is the targeted one
+    strategy -> name of one of the ddmin_strategies, e. g. 'complements' for the complete ddmin or 'probdd',
+                'hdd' for the hierarchical_ddmin() over the node tree instead of ddmin_loop()
+    pre_reduce -> None, 'line' or 'paragraph' to remove whole lines or paragraphs by pre_reduction() first
+    oracle_cache -> OracleCache, e. g. shared by several sessions, None for an own one at cache_path
+    cache_path -> SQLite file of the own oracle_cache, None for a cache in memory only
+    work_dir -> folder in which the default_backend() creates the unique workspace of the session, None for 
+                its default
+    tmpfs -> boolean, True to create the workspace in memory (/dev/shm) when no work_dir is given
+    report_path -> JSON file to which reduce_file() writes the report of the ReductionStats, None for none
+    trace_path -> file of the SearchTrace of every tested candidate, None for no trace
+    trace_format -> 'jsonl' or 'chrome', see SearchTrace
+    '''
+    
+    def __init__(self, backend=None, workers=1, precompile_preamble=False, halt_on_error=False, equivalence='class', 
+                 strategy='subset', pre_reduce=None, oracle_cache=None, cache_path='oracle_cache.sqlite', work_dir=None, 
+                 tmpfs=False, report_path=None, trace_path=None, trace_format='jsonl'):
+        
+        strategies = sorted(ddmin_strategies) + ['hdd']
+        
+        if strategy not in strategies:
+            
+            raise ValueError(f'Unknown strategy {strategy!r}, use one of {", ".join(strategies)}')
+        
+        if isinstance(equivalence, str) and equivalence not in equivalence_policies:
+            
+            raise ValueError(f'Unknown equivalence {equivalence!r}, use one of {", ".join(sorted(equivalence_policies))} or a function')
+        
+        if backend is None:
+            
+            backend = default_backend(precompile_preamble=precompile_preamble, halt_on_error=halt_on_error, work_dir=work_dir, tmpfs=tmpfs)
+            
+        if oracle_cache is None:
+            
+            oracle_cache = OracleCache(path=cache_path)
+        
+        self.backend = backend
+        self.backend_version = None
+        self.workers = workers
+        self.oracle_cache = oracle_cache
+        self.compile_pool = None # AsyncCompileScheduler of the parallel mode, None in the serial mode
+        self.error_equivalence = equivalence_policies[equivalence] if isinstance(equivalence, str) else equivalence
+        self.strategy = strategy
+        self.ddmin_strategy = ddmin_strategies[strategy] if strategy != 'hdd' else ddmin
+        self.pre_reduce = pre_reduce
+        self.work_dir = work_dir
+        self.stats = ReductionStats() # counts of all reductions of the session
+        self.report_path = report_path
+        self.trace = SearchTrace(trace_path, trace_format) if trace_path is not None else None
+        self.started = False
+        
+    def start(self):
+        
+        start_time = time.perf_counter()
+        self.backend.start()
+        
+        # the version is asked for after the start as e. g. the Docker image is built by then:
+        self.backend_version = self.backend.version()
+        self.stats.add_time('backend start', time.perf_counter() - start_time)
+        
+        if self.workers > 1:
+
+            self.compile_pool = AsyncCompileScheduler(self, max_concurrency=self.workers)
+            self.compile_pool.start()
+            
+        self.started = True
+        
+    def stop(self):
+        
+        # e. g. the long-lived TeX container is only needed during the session:
+        if self.compile_pool is not None:
+
+            self.compile_pool.shutdown()
+            self.compile_pool = None
+
+        self.backend.stop()
+        self.started = False
+        
+        if self.trace is not None:
+            
+            self.trace.close()
+            
+    def trace_test(self, context, curr_delta, curr_latex_string, error_message, start_time, cache_hit, decision=None):
+        '''
+        adds the outcome of a test to the SearchTrace of the session when there is one, decision overrides 
+        the decision found from the error_message, e. g. 'cancelled'
+        '''
+        
+        if self.trace is not None:
+            
+            self.trace.add(self.error_equivalence, self.backend.name, context, curr_delta, curr_latex_string, 
+                           error_message, start_time, cache_hit, decision)
+        
+    def __enter__(self):
+        
+        self.start()
+        
+        return self
+    
+    def __exit__(self, *exc_info):
+        
+        self.stop()
+        
+    def reduce_string(self, raw_string, stats=None, file_name=None):
+        '''
+        reduces the content of one .tex file, the session has to be started. The DocumentTree, the 
+        ReductionStats and the targeted error message are kept in the reduction_state of the calling thread.
+
+        params:
+        raw_string -> the content of the .tex file
+        stats -> ReductionStats which counts the tests, None for new ones
+        file_name -> path of the .tex file, only used for the SearchTrace
+
+        returns the reduced LaTeX string or a message why it could not be reduced
+        '''
+        
+        stats = stats if stats is not None else ReductionStats()
+        
+        reduction_state.session = self
+        reduction_state.stats = stats
+        reduction_state.file_name = file_name
+        reduction_state.error_message = None
+        
+        try:
+            
+            with timed('reduction'):
+            
+                return self.reduce(raw_string)
+        
+        finally:
+            # the thread may be reused, e. g. for the next file of a batch:
+            
+            reduction_state.session = None
+            reduction_state.stats = None
+            reduction_state.phase = None
+            reduction_state.file_name = None
+            reduction_state.document_tree = None
+            self.stats.add(stats)
+        
+    def reduce(self, raw_string):
+        
+        if self.pre_reduce is not None:
+
+            raw_string = pre_reduction(raw_string, granularity=self.pre_reduce)
+
+        # parse it once, the later splits take the nodes from the tree:
+        with timed('parse'):
+            
+            reduction_state.document_tree = DocumentTree(raw_string)
+
+        front_skeleton, center_content, back_skeleton, nested_commands_center, error_message_stored = prepare_ddmin(raw_string, curr_layer=0, problem_id=0)
+
+        if isinstance(front_skeleton, str):
+
+            return front_skeleton
+
+        reduction_state.error_message = error_message_stored
+        first_front_skeleton = front_skeleton
+        first_back_skeleton = back_skeleton
+
+        if center_content == []:
+            # as described above the \begin{document} AND/OR maybe \end{document} are missing.
+
+            return 'The \\begin{document} and/or \\end{document} are missing!'
+
+        if self.strategy == 'hdd':
+
+            return hierarchical_ddmin(reduction_state.document_tree, error_message_stored)
+
+        return ddmin_loop(front_skeleton, center_content, back_skeleton, nested_commands_center, error_message_stored, first_front_skeleton, first_back_skeleton)
+    
+    def reduce_file(self, file_name):
+        '''
+        reduces one .tex file, a not started session is started and stopped around it
+        
+        params file_name -> the path including the .tex file to process
+        
+        returns the reduced LaTeX string or a message why it could not be reduced
+        '''
+        
+        # open the file as string:
+        raw_string = open_full_file_as_string(file_name=file_name)
+        
+        try:
+            
+            if self.started:
+
+                return self.reduce_string(raw_string, file_name=file_name)
+
+            with self:
+
+                return self.reduce_string(raw_string, file_name=file_name)
+            
+        finally:
+            
+            if self.report_path is not None:
+                
+                self.stats.write_json(self.report_path)
+        
+    def reduce_batch(self, pattern, results_path='batch_results.json', workers=4):
+        '''
+        reduces every .tex file of a directory or glob pattern. The files are reduced at the same time by a 
+        pool of worker threads which share the backend, the oracle_cache and the compile_pool of the session.
+        The per-file results and a summary are written as JSON file.
+
+        params:
+        pattern -> directory or glob pattern of the .tex files
+        results_path -> path of the JSON file, None for no file
+        workers -> number of .tex files reduced at the same time
+
+        returns:
+        results -> list of dictionaries with the file, the reduced LaTeX string (final_latex), the first line
+                   of the targeted error message, the number of tests, compiles and cache hits and the wall time
+        summary -> dictionary with the totals over all files
+        '''
+        
+        file_names = batch_files(pattern)
+
+        def reduce_file(file_name):
+
+            stats = ReductionStats()
+            start_time = time.perf_counter()
+            result = {'file': file_name, 'final_latex': None, 'error': None, 'exception': None}
+
+            try:
+
+                result['final_latex'] = self.reduce_string(open_full_file_as_string(file_name=file_name), stats, file_name)
+
+            except Exception as exception:
+                # one broken file does not stop the batch:
+
+                result['exception'] = repr(exception)
+
+            if getattr(reduction_state, 'error_message', None) is not None:
+
+                result['error'] = reduction_state.error_message.strip().split('\n')[0]
+                reduction_state.error_message = None
+
+            result.update(stats.report())
+            result['wall_time'] = time.perf_counter() - start_time
+
+            return result
+        
+        started = self.started
+        
+        if not started:
+            
+            self.start()
+            
+        start_time = time.perf_counter()
+
+        try:
+
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+
+                results = list(executor.map(reduce_file, file_names))
+
+        finally:
+
+            if not started:
+                
+                self.stop()
+
+        summary = {'files': len(results), 
+                   'failed': sum(result['exception'] is not None for result in results), 
+                   'tests': sum(result['tests'] for result in results), 
+                   'compiles': sum(result['compiles'] for result in results), 
+                   'cache_hits': sum(result['cache_hits'] for result in results), 
+                   'wall_time': time.perf_counter() - start_time}
+
+        if results_path is not None:
+
+            with open(results_path, 'w') as g:
+                json.dump({'summary': summary, 'results': results}, g, indent=2)
+
+        return results, summary
+        
+        
+def ddmin_connected(file_name, backend=None, workers=1, precompile_preamble=False, halt_on_error=False, equivalence='class', strategy='subset', pre_reduce=None, report_path=None, 
+                    trace_path=None, trace_format='jsonl'):
+    '''
+    is called by the user to start the process. The parameters are described at ReductionSession.
+    
+    params file_name -> the path including the .tex file to process
+    
+    returns:
+    ReductionSession.reduce_file() -> function call to go to the next process step
+    '''
+    
+    session = ReductionSession(backend, workers, precompile_preamble, halt_on_error, equivalence, strategy, pre_reduce, 
+                               report_path=report_path, trace_path=trace_path, trace_format=trace_format)
+    
+    return session.reduce_file(file_name)
+        
+        
+def batch_files(pattern):
+    '''
+    returns the sorted paths of the .tex files of a directory or of a glob pattern, e. g. 
+    'tex_test_files/incorrect*.tex'
+    '''
+    
+    if os.path.isdir(pattern):
+        
+        pattern = os.path.join(pattern, '*.tex')
+        
+    return sorted(glob.glob(pattern))
+
+
+def ddmin_batch(pattern, results_path='batch_results.json', backend=None, workers=4, compile_workers=1, 
+                precompile_preamble=False, halt_on_error=False, equivalence='class', strategy='subset', pre_reduce=None, 
+                trace_path=None, trace_format='jsonl'):
+    '''
+    reduces every .tex file of a directory or glob pattern by ReductionSession.reduce_batch().
+    
+    params:
+    pattern -> directory or glob pattern of the .tex files
+    results_path -> path of the JSON file, None for no file
+    workers -> number of .tex files reduced at the same time
+    compile_workers -> number of pdfLaTeX runs at the same time within the compile_pool, 1 for none
+    The other parameters are described at ReductionSession. 
+    
+    returns the results and the summary of ReductionSession.reduce_batch()
+    '''
+    
+    session = ReductionSession(backend, compile_workers, precompile_preamble, halt_on_error, equivalence, strategy, pre_reduce, 
+                               trace_path=trace_path, trace_format=trace_format)
+    
+    return session.reduce_batch(pattern, results_path, workers)
+    
+    
+def ddmin_loop(front_skeleton, center_content, back_skeleton, nested_commands_center, error_message_stored, first_front_skeleton, first_back_skeleton):
+    '''
+    organizes the process by running the ddmin() algorithm and reacting to its output statement.
+    
+    params:
+    front_skeleton -> preamble/front skeleton in front of the center of interest/center_content
+    center_content -> list with current deltas of interest, body or content of nested command
+    back_skeleton -> back skeleton after the center of interest/center_content
+    nested_commands_center -> list refering to the elements/deltas of center_content informing whether the
+                              deltas are nested (True) or not (False)
+    error_message_stored -> the error message produced by the original .tex file which we target on
+    first_front_skeleton -> unmodified front skeleton to perceive the valid .tex structure
+    first_back_skeleton -> unmodified back skeleton to perceive the valid .tex structure
+    
+    returns final_latex -> the final LaTeX code output presented as a string, concretizing the error 
+                           location
+    '''
+    
+    first_time_outside = True
+    looper = True
+    env_begins = True # mark if we want the {begins} or the {ends} of the newenvironment
+    front_ind = 0
+    
+    while True:
+
+        center_content, delta_id_list, statement = current_session().ddmin_strategy(front_skeleton, center_content, back_skeleton, error_message_stored, curr_layer=1, problem_id=0)
 
-        center_content, delta_id_list, statement = ddmin(front_skeleton, center_content, back_skeleton, error_message_stored, curr_layer=1, problem_id=0)
-
         if isinstance(center_content, str):
             
             return center_content
@@ -1425,38 +4131,15 @@ def ddmin_loop(front_skeleton, center_content, back_skeleton, nested_commands_ce
             if first_time_outside:
                 # the first time we find out that the error has to be beyond the center_content 
 
-                center_content = []
-                nested_commands_center = []
-                f1 = []
-
-                for command in front_skeleton:
+                f1, center_content, nested_commands_center, begin_commands = preamble_split(front_skeleton)
+                
+                if isinstance(f1, str):
                     
-                    command_list, start_content_ind, end_content_ind, nested_commands_delta = commandlist_finder(command, '')
-
-                    if isinstance(command_list, str):
-                        
-                        return command_list
+                    return f1
+                
+                for command in begin_commands:
                     
-                    for c_ind, command in enumerate(command_list):
-                        
-                        if '\\documentclass' in command or f1 == []:
-                            # all commands before \\documentclass get stored in front skeleton
-                            
-                            if f1 == [] and (not command.startswith('%') and not '\\documentclass' in command):
-                                
-                                return 'Final output: command before \\documentclass or \\documentclass missing/mis-spelled.'
-                            
-                            f1.append(command)
-                            
-                        elif '\\begin{document}' in command:
-                            
-                            back_skeleton.insert(0, command)
-                            
-                        else:
-                            
-                            center_content.append(command)
-                            nested_commands_center.append(nested_commands_delta[c_ind])
-
+                    back_skeleton.insert(0, command)
                             
                 front_skeleton = f1
                 first_time_outside = False
@@ -1484,6 +4167,12 @@ def ddmin_loop(front_skeleton, center_content, back_skeleton, nested_commands_ce
             
             final_latex = ''.join(center_content)
             return final_latex
+        
+        elif statement == 'error for cooperating deltas':
+            # only all of these deltas together lead to the error, none can be removed
+            
+            final_latex = ''.join(front_skeleton + center_content + back_skeleton)
+            return final_latex
                     
         elif statement == 'error for the given delta':
             # we have to check whether the given delta can be split up in further parts. 
@@ -1563,67 +4252,68 @@ def ddmin_loop(front_skeleton, center_content, back_skeleton, nested_commands_ce
                     command_ele_back = ''.join(command_back) #'\\end{' + command_ele + '}'
                     
                     # test empty shell of nest:                       
-                    latex_string_inter = ''.join(front_skeleton + [command_ele_front] + [command_ele_back] + back_skeleton)  
-                    curr_delta_inter = f'emptyShell{ind_command}'
-                    log_file_image_path_inter, container_name_inter, project_folder_inter = docker_organizer(curr_delta=curr_delta_inter,curr_latex_string=latex_string_inter, first_run=False)
-                    error_message_inter = latex_failure_check(log_file_image_path_inter, container_name_inter, project_folder_inter)
+                    latex_string_shell = ''.join(front_skeleton + [command_ele_front] + [command_ele_back] + back_skeleton)  
+                    curr_delta_shell = f'emptyShell{ind_command}'
+                    
+                    # the empty shell and the probes of a), c) and d) are independent of each other. In the
+                    # parallel mode all of them are compiled at the same time, the results are still taken
+                    # over in the order below such that the decision is the same as in the serial mode:
+                    prefetched = {}
+                    
+                    if current_session().compile_pool is not None:
+                        
+                        reduction_state.phase = 'empty shell'
+                        prefetched = oracle_prefetch([(curr_delta_shell, latex_string_shell, [])])
+                        
+                        for curr_delta_inter, latex_string_inter, f, b, c, c_ids in nest_probes(front_skeleton, back_skeleton, command_ele_front, command_ele_back, center_content_delta, nested_commands_center, ind_command):
+                            
+                            reduction_state.phase = nest_phase(curr_delta_inter)
+                            prefetched.update(oracle_prefetch([(curr_delta_inter, latex_string_inter, c_ids)]))
+                    
+                    reduction_state.phase = 'empty shell'
+                    error_message_inter = oracle_result(prefetched, curr_delta_shell, latex_string_shell, [])
 
-                    if error_message_inter == error_message_stored:
+                    if same_error(error_message_inter, error_message_stored):
                         # error lies in the empty shell
                         
-                        return latex_string_inter
+                        oracle_cancel(prefetched)
+                        
+                        return latex_string_shell
 
 
                     # a): Test if single command error, then if nested to put in ddmin_looper
                     # c): Works like a) but with slightly modified front and back skeleton
                     # d): works like c) but extends center
-                    d_counter = 0
-                    c_list = []
+                    for curr_delta_inter, latex_string_inter, f, b, c, c_ids in nest_probes(front_skeleton, back_skeleton, command_ele_front, command_ele_back, center_content_delta, nested_commands_center, ind_command):
                     
-                    for f, b in [('',''),(command_ele_front, command_ele_back),(command_ele_front, command_ele_back)]:
-                        
-                        d_counter += 1
-                        
-                        for d, c in zip(nested_commands_center, center_content_delta):
-                            
-                            if d_counter == 3:
-                                
-                                c_list.append(c)
-                                c_cur_list = c_list
-                                
-                            else:
-                                
-                                c_cur_list = [c]
-
-                            # test single command for error:
-                            latex_string_inter = ''.join(front_skeleton + [f] + c_cur_list + [b] + back_skeleton) 
-                            curr_delta_inter = f'nestContentOnly{ind_command}{d}'
-                            
-                            log_file_image_path_inter, container_name_inter, project_folder_inter = docker_organizer(curr_delta=curr_delta_inter,curr_latex_string=latex_string_inter, first_run=False)
-                            error_message_inter = latex_failure_check(log_file_image_path_inter, container_name_inter, project_folder_inter)
+                        # test single command for error:
+                        reduction_state.phase = nest_phase(curr_delta_inter)
+                        error_message_inter = oracle_result(prefetched, curr_delta_inter, latex_string_inter, c_ids)
 
-                            if error_message_inter == error_message_stored:
-                                # in this command lays error
+                        if same_error(error_message_inter, error_message_stored):
+                            # in this command lays error
+                        
+                            oracle_cancel(prefetched)
 
-                                command_list_d, start_content_ind_d, end_content_ind_d, nested_commands_d = commandlist_finder(c, start_content_comment='')
+                            command_list_d, start_content_ind_d, end_content_ind_d, nested_commands_d = commandlist_finder(c, start_content_comment='')
 
-                                if isinstance(command_list_d, str):
-                                    
-                                    return command_list_d
-                                
-                                if True in nested_commands_d:
-                                    # The current command contains the error and can be split up further
-                                    # -> put it into ddmin_looper
-                                    
-                                    front_skeleton = front_skeleton + [f]
-                                    back_skeleton = [b] + back_skeleton 
+                            if isinstance(command_list_d, str):
+                            
+                                return command_list_d
+                        
+                            if True in nested_commands_d:
+                                # The current command contains the error and can be split up further
+                                # -> put it into ddmin_looper
+                            
+                                front_skeleton = front_skeleton + [f]
+                                back_skeleton = [b] + back_skeleton 
 
-                                    return ddmin_loop(front_skeleton, command_list_d, back_skeleton, nested_commands_d, error_message_stored, first_front_skeleton, first_back_skeleton)
-                                
-                                else:
+                                return ddmin_loop(front_skeleton, command_list_d, back_skeleton, nested_commands_d, error_message_stored, first_front_skeleton, first_back_skeleton)
+                        
+                            else:
 
-                                    # error in c but it is not nested
-                                    return latex_string_inter
+                                # error in c but it is not nested
+                                return latex_string_inter
 
                         
                     # error lies in the full command but not determinable where exactly, therefore
@@ -1646,31 +4336,55 @@ def ddmin_loop(front_skeleton, center_content, back_skeleton, nested_commands_ce
 # In[34]:
 
 
-path_input = input('Define .tex file name or path, e. g. tex_test_files/incorrect1.tex')
-
-if path_input == '':
-    
-    path_input = 'tex_test_files/incorrect1.tex'
-    
-elif '/' not in path_input:
-    # we only have the filename 
+def main():
+    '''
+    command line interface: asks for the .tex file, a directory or a glob pattern and prints the outcome
+    '''
     
-    if '.tex' not in path_input: 
-        # we only have the filename without extension
+    path_input = input('Define .tex file name or path, e. g. tex_test_files/incorrect1.tex, or a directory or glob pattern for the batch mode')
+
+    if os.path.isdir(path_input) or any(char in path_input for char in '*?['):
+        # batch mode over several .tex files
+
+        batch_results, batch_summary = ddmin_batch(path_input)
         
-        path_input = 'tex_test_files/' + path_input  + '.tex'
-    
-    else:
+        for batch_result in batch_results:
+
+            print(batch_result['file'], batch_result['compiles'], 'compiles', round(batch_result['wall_time'], 1), 's:', batch_result['error'])
+
+        print(batch_summary)
         
-        path_input = 'tex_test_files/' + path_input 
+        return
+
+    if path_input == '':
+
+        path_input = 'tex_test_files/incorrect1.tex'
+
+    elif '/' not in path_input:
+        # we only have the filename 
+
+        if '.tex' not in path_input: 
+            # we only have the filename without extension
+
+            path_input = 'tex_test_files/' + path_input  + '.tex'
+
+        else:
+
+            path_input = 'tex_test_files/' + path_input 
+
+    session = ReductionSession()
+    final_latex = session.reduce_file(path_input)
     
-final_latex = ddmin_connected(file_name=path_input)
+    print(final_latex)
+    print(session.stats.summary())
 
 
 # In[35]:
 
 
-print(final_latex)
+if __name__ == '__main__':
+    
+    main()
 
 
 # Done
@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+# coding: utf-8
+
+# tests of the pure functions of project.py which need no pdfLaTeX, run with 'python -m pytest'
+
+import project
+
+
+def test_chunk_balance_closed():
+
+    assert project.chunk_balance('\\textbf{a} \\[ x \\] \\( y \\) $z$\n') == (0, 0, 0, 0, 0)
+    assert project.chunk_balance('\\begin{itemize}\n\\item {a\n') == (1, 1, 0, 0, 0)
+
+
+def test_chunk_balance_escapes_and_comments():
+
+    # escaped characters and comments open nothing:
+    assert project.chunk_balance('50\\% \\{ \\$ % { $ \\[\n') == (0, 0, 0, 0, 0)
+
+
+def test_chunk_balance_line_breaks():
+
+    # \\[2pt] is a line break with spacing, no display math:
+    assert project.chunk_balance('Line one \\\\[2pt]\n') == (0, 0, 0, 0, 0)
+    # \\{ is a line break followed by an opened bracket:
+    assert project.chunk_balance('a \\\\{b\n') == (1, 0, 0, 0, 0)
+    # \\% is a line break followed by a comment:
+    assert project.chunk_balance('a \\\\% {\n') == (0, 0, 0, 0, 0)
+
+
+def test_coarse_chunks_paragraphs():
+
+    body = 'Line one \\\\[2pt]\nline two\n\nPara two\n\nPara three\n'
+    chunks = project.coarse_chunks(body)
+
+    assert ''.join(chunks) == body
+    assert chunks == ['Line one \\\\[2pt]\nline two\n', '\nPara two\n', '\nPara three\n']
+
+
+def test_coarse_chunks_joins_open_environments():
+
+    body = '\n\\begin{itemize}\n\n\\item a\n\n\\end{itemize}\n\nText\n'
+    chunks = project.coarse_chunks(body)
+
+    assert ''.join(chunks) == body
+    assert chunks == ['\n\\begin{itemize}\n\n\\item a\n\n\\end{itemize}\n', '\nText\n']
+
+
+def test_coarse_chunks_lines():
+
+    body = 'a {\nb }\nc\n'
+
+    assert project.coarse_chunks(body, granularity='line') == ['a {\nb }\n', 'c\n']
+
+
+def test_preamble_split():
+
+    front = ['\\documentclass{article}\n\\usepackage{xcolor}\n\\newcommand{\\vect}{\\hat{v}}\n\\begin{document}']
+    f1, commands, nested, begin_commands = project.preamble_split(front)
+
+    assert f1 == ['\\documentclass{article}']
+    assert [command for command in commands if command.strip() != ''] == ['\\usepackage{xcolor}', '\\newcommand{\\vect}{\\hat{v}}']
+    assert begin_commands == ['\\begin{document}']
+
+
+def greedy_minimal(delta_id_list, document_of, error_message_stored, test_name):
+    # stands in for ddmin_minimal(): the 'error' is the definition of \vect together with its usage
+
+    def fails(kept):
+
+        document = document_of(kept)
+
+        return '\\newcommand{\\vect}' in document and 'Here \\vect' in document
+
+    current = list(delta_id_list)
+
+    for delta_id in delta_id_list:
+
+        if fails([kept for kept in current if kept != delta_id]):
+
+            current.remove(delta_id)
+
+    return current
+
+
+def test_reduce_preamble():
+
+    front = ['\\documentclass{article}\n\\usepackage{xcolor}\n\\newcommand{\\vect}{\\hat{v}}\n\\newcommand{\\unused}{x}\n\\begin{document}']
+    center_content = ['Some text.', '\n', 'Here \\vect', '\n']
+    back = ['\\end{document}\n']
+
+    current = project.reduce_preamble(front, center_content, back, ['0', '2'], '', greedy_minimal, 'test')
+
+    assert current == ['2']
+    # the lines of whitespace only are kept:
+    assert front == ['\\documentclass{article}\n\n\\newcommand{\\vect}{\\hat{v}}\n\n\\begin{document}']